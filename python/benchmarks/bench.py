@@ -0,0 +1,91 @@
+"Benchmarks the client's hot paths against the local mock server, reporting throughput, p50/p99 latency and peak memory."
+
+import argparse
+import json
+import sadstate
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+def _percentile(samples:list[float], q:float):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+def measure(name:str, fn, iterations:int, **params):
+    "Calls fn iterations times, returning a result row with throughput, latency percentiles and peak traced memory."
+    fn()
+    tracemalloc.start()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "benchmark":name,
+        **params,
+        "ops_per_s":iterations / elapsed,
+        "p50_ms":_percentile(samples, 0.5) * 1000,
+        "p99_ms":_percentile(samples, 0.99) * 1000,
+        "mean_ms":statistics.fmean(samples) * 1000,
+        "peak_kib":peak / 1024,
+    }
+
+def start_server(latency:float=0.0):
+    "Starts the mock server in a subprocess, so its allocations are not counted, returning the process and its host URL."
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.mock_server", "--port", "0", "--latency", str(latency)], stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().split()[-1]
+
+def run(host:str, profile_counts:list[int], payload_sizes:list[int], iterations:int):
+    "Runs every benchmark against host, returning a list of result rows."
+    session = sadstate.sessions.Session(host)
+    session.new_auth("benchmark")
+    results = []
+    for count in profile_counts:
+        name = f"bench-{count}-{time.time_ns()}"
+        session.register_project(name)
+        project = session.get_project(name).project
+        session.map(lambda i: project.add_profile(f"profile-{i}"), range(count))
+        results.append(measure("get_project", lambda: session.get_project(name), iterations, profiles=count))
+        results.append(measure("get_all_profiles", project.get_all_profiles, iterations, profiles=count))
+        profile = project.get_profile("profile-0").profile
+        for size in payload_sizes:
+            payload = b"\x5a" * size
+            results.append(measure("write", lambda: profile.write(payload), iterations, profiles=count, payload=size))
+            results.append(measure("read", profile.read, iterations, profiles=count, payload=size))
+            profile.write(b"")
+            results.append(measure("append", lambda: profile.append(payload[:max(1, size // iterations)]), iterations, profiles=count, payload=max(1, size // iterations)))
+        project.delete()
+    return results
+
+def _format(results:list[dict]):
+    columns = ["benchmark", "profiles", "payload", "ops_per_s", "p50_ms", "p99_ms", "peak_kib"]
+    rows = [[f"{row[column]:.2f}" if isinstance(row.get(column), float) else str(row.get(column, "")) for column in columns] for row in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines += ["  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows]
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", help="benchmark an already running server instead of starting the mock server")
+    parser.add_argument("--profiles", type=int, nargs="+", default=[10, 100, 1000], help="profile counts per project")
+    parser.add_argument("--payloads", type=int, nargs="+", default=[1024, 65536, 2**20], help="payload sizes in bytes")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of latency added by the mock server")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    host, server = args.host, None
+    if host is None:
+        server, host = start_server(args.latency)
+    try:
+        results = run(host, args.profiles, args.payloads, args.iterations)
+    finally:
+        if server is not None:
+            server.terminate()
+    print(json.dumps(results, indent=2) if args.json else _format(results))
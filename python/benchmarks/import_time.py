@@ -0,0 +1,47 @@
+"Measures how long importing sadstate modules takes in a fresh interpreter, using python -X importtime, and whether each import pulls in requests."
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ["sadstate", "sadstate.permissions", "sadstate.responses", "sadstate.sessions"]
+
+def measure(module:str, repeat:int=5):
+    "Imports module in repeat fresh interpreters, returning a result row with the median cumulative import time and whether requests was imported."
+    samples = []
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import sys, {module}; print('requests' in sys.modules)"], capture_output=True, text=True, check=True)
+        #lines look like "import time: self [us] | cumulative | name", with nested imports indented under the name
+        total = 0
+        for line in process.stderr.splitlines():
+            if line.startswith("import time:") and not line.endswith("| imported package"):
+                _, cumulative, name = line.split("|")
+                if not name.startswith("  ") and name.strip().split(".")[0] == "sadstate":
+                    total += int(cumulative)
+        samples.append(total)
+    return {
+        "module":module,
+        "import_ms":statistics.median(samples) / 1000,
+        "imports_requests":process.stdout.strip() == "True",
+    }
+
+def _format(results:list[dict]):
+    width = max(len(row["module"]) for row in results)
+    lines = [f"{'module'.ljust(width)}  import_ms  requests"]
+    lines += [f"{row['module'].ljust(width)}  {row['import_ms']:9.2f}  {'yes' if row['imports_requests'] else 'no'}" for row in results]
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module, the median is reported")
+    parser.add_argument("--budget", type=float, help="exit with status 1 if importing the first module takes longer than this many milliseconds")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    results = [measure(module, args.repeat) for module in args.modules]
+    print(json.dumps(results, indent=2) if args.json else _format(results))
+    if args.budget is not None and results[0]["import_ms"] > args.budget:
+        print(f"Importing {results[0]['module']} took {results[0]['import_ms']:.2f}ms, over the {args.budget}ms budget.", file=sys.stderr)
+        sys.exit(1)
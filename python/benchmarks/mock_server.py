@@ -0,0 +1,229 @@
+"A local stand-in for a SADState server, for benchmarking the client without a live deployment."
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import base64
+import email.parser
+import email.policy
+import json
+import random
+import threading
+import time
+import urllib.parse
+
+def _b64_id(id:int):
+    return base64.b64encode(id.to_bytes(8, "little")).decode("utf-8")
+
+class MockState:
+    "In-memory projects, profiles and auths shared by all request handlers."
+
+    def __init__(self, capacity:int=2**24, latency:float=0.0, jitter:float=0.0, error_rate:float=0.0):
+        self.capacity = capacity
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.auths:dict[int, str] = {}
+        #project name -> {"id", "permissions", "profiles": {profile name -> {"id", "permissions", "content"}}}
+        self.projects:dict[str, dict] = {}
+        self._next_id = 0
+
+    def new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+class MockHandler(BaseHTTPRequestHandler):
+    "Implements the /auth/*, /project/* and /project/profile/* endpoints against the server's MockState."
+
+    protocol_version = "HTTP/1.1"
+    #headers and bodies are written separately, which would otherwise stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = bytearray()
+            while size := int(self.rfile.readline().strip(), 16):
+                body += self.rfile.read(size)
+                self.rfile.readline()
+            self.rfile.readline()
+            return bytes(body)
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _form(self):
+        body = self._body()
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body)
+            return {part.get_param("name", header="content-disposition"):part.get_payload(decode=True) for part in message.iter_parts()}
+        return {key:values[0] for key, values in urllib.parse.parse_qs(body.decode("utf-8")).items()}
+
+    def _send(self, status:int, body:bytes|str=b"", content_type:str="text/plain"):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self):
+        state:MockState = self.server.state
+        url = urllib.parse.urlsplit(self.path)
+        params = {key:values[0] for key, values in urllib.parse.parse_qs(url.query).items()}
+        if self.command == "POST":
+            for key, value in self._form().items():
+                params[key] = value.decode("utf-8") if isinstance(value, bytes) and key != "data" else value
+        if state.latency or state.jitter:
+            time.sleep(state.latency + random.uniform(0, state.jitter))
+        if state.error_rate and random.random() < state.error_rate:
+            return self._send(503, "Injected error")
+        handler = getattr(self, "_" + url.path.strip("/").replace("/", "_"), None)
+        if handler is None:
+            return self._send(404, "Unknown endpoint")
+        with state.lock:
+            handler(state, params)
+
+    def _auth_new(self, state:MockState, params:dict):
+        id = state.new_id()
+        state.auths[id] = params.get("password", "")
+        self._send(200, str(id))
+
+    def _auth_set(self, state:MockState, params:dict):
+        if state.auths.get(int(params["id"])) != params.get("password"):
+            return self._send(401, "Invalid auth")
+        self._send(200)
+
+    def _project_register(self, state:MockState, params:dict):
+        if params["name"] in state.projects:
+            return self._send(403, "Already a Project with that name")
+        fields = json.loads(params.get("fields", "{}"))
+        state.projects[params["name"]] = {"id":state.new_id(), "permissions":fields.get("permissions") or {}, "profiles":{}}
+        self._send(200)
+
+    def _project(self, state:MockState, params:dict):
+        project = state.projects.get(params.get("name"))
+        if project is None:
+            self._send(404, "Project not found")
+        return project
+
+    def _profile(self, state:MockState, params:dict, missing_status:int=404):
+        project = self._project(state, params)
+        if project is None:
+            return None, None
+        profile = project["profiles"].get(params.get("profile_name"))
+        if profile is None:
+            self._send(missing_status, "Profile not found")
+        return project, profile
+
+    def _project_get(self, state:MockState, params:dict):
+        if (project := self._project(state, params)) is not None:
+            self._send(200, json.dumps({"id":_b64_id(project["id"]), "name":params["name"], "permissions":project["permissions"]}), "application/json")
+
+    def _project_delete(self, state:MockState, params:dict):
+        if self._project(state, params) is not None:
+            del state.projects[params["name"]]
+            self._send(200)
+
+    def _project_edit(self, state:MockState, params:dict):
+        fields = json.loads(params.get("fields", "{}"))
+        if "profile_name" in params:
+            project, target = self._profile(state, params)
+            names, key = (project or {}).get("profiles"), params["profile_name"]
+        else:
+            target = self._project(state, params)
+            names, key = state.projects, params["name"]
+        if target is None:
+            return
+        if fields.get("name"):
+            if fields["name"] in names:
+                return self._send(403, "Already a Profile with that name" if "profile_name" in params else "Already a Project with that name")
+            names[fields["name"]] = names.pop(key)
+        if fields.get("permissions"):
+            target["permissions"].update(fields["permissions"])
+        self._send(200)
+
+    def _project_profile_add(self, state:MockState, params:dict):
+        if (project := self._project(state, params)) is not None:
+            if params["profile_name"] in project["profiles"]:
+                return self._send(403, "Already a Profile with that name")
+            fields = json.loads(params.get("fields", "{}"))
+            project["profiles"][params["profile_name"]] = {"id":state.new_id(), "permissions":fields.get("permissions") or {}, "content":b""}
+            self._send(200)
+
+    def _project_profile_all(self, state:MockState, params:dict):
+        if (project := self._project(state, params)) is not None:
+            self._send(200, json.dumps([
+                {"id":_b64_id(profile["id"]), "name":name, "permissions":profile["permissions"]}
+                for name, profile in project["profiles"].items()
+            ]), "application/json")
+
+    def _project_profile_get(self, state:MockState, params:dict):
+        if (profile := self._profile(state, params)[1]) is not None:
+            self._send(200, json.dumps({"id":_b64_id(profile["id"]), "name":params["profile_name"], "permissions":profile["permissions"]}), "application/json")
+
+    def _project_profile_remove(self, state:MockState, params:dict):
+        project, profile = self._profile(state, params)
+        if profile is not None:
+            del project["profiles"][params["profile_name"]]
+            self._send(200)
+
+    def _project_profile_read(self, state:MockState, params:dict):
+        if (profile := self._profile(state, params)[1]) is not None:
+            content = profile["content"]
+            byte_range = self.headers.get("Range")
+            if byte_range is None:
+                return self._send(200, content, "application/octet-stream")
+            start, end = byte_range.removeprefix("bytes=").split("-")
+            start, end = int(start), int(end) if end else len(content) - 1
+            if start >= len(content):
+                return self._send(416, "Range not satisfiable")
+            self._send(206, content[start:end + 1], "application/octet-stream")
+
+    def _write(self, state:MockState, params:dict, append:bool):
+        if (profile := self._profile(state, params, 400)[1]) is not None:
+            content = (profile["content"] if append else b"") + params.get("data", b"")
+            if len(content) > state.capacity:
+                return self._send(413, "Not enough space in Profile")
+            profile["content"] = content
+            self._send(200, str(state.capacity - len(content)))
+
+    def _project_profile_write(self, state:MockState, params:dict):
+        self._write(state, params, False)
+
+    def _project_profile_append(self, state:MockState, params:dict):
+        self._write(state, params, True)
+
+def start(port:int=0, **options):
+    "Starts a MockState-backed server on a background thread, returning the server and its host URL. options are passed to MockState."
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockHandler)
+    server.daemon_threads = True
+    server.state = MockState(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--capacity", type=int, default=2**24, help="bytes available to each Profile")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum random seconds added on top of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+    server, host = start(args.port, capacity=args.capacity, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    print(f"Serving on {host}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
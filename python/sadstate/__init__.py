@@ -1,2 +1,19 @@
-from . import permissions, profiles, projects, responses, sessions, util
-from .util import resolve
\ No newline at end of file
+import importlib
+
+#submodules are imported on first access, so e.g. using permissions flags does not import requests
+_SUBMODULES = frozenset({
+    "aio", "appenders", "caching", "compression", "exceptions", "metrics", "permissions", "profiles", "projects",
+    "provisioning", "responses", "sessions", "sharding", "snapshots", "streams", "transport", "util", "watching",
+})
+
+__all__ = sorted(_SUBMODULES - {"aio"}) + ["resolve"]
+
+def __getattr__(name:str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if name == "resolve":
+        return importlib.import_module(".util", __name__).resolve
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES | {"resolve"})
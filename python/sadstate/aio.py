@@ -0,0 +1,382 @@
+from . import exceptions, permissions as permissions_, profiles, projects, responses, sessions
+import aiohttp
+import asyncio
+import io
+import json
+
+class _Result:
+    "A fully read aiohttp response exposing the parts of requests.Response used by the responses module."
+
+    __slots__ = "status_code", "reason", "url", "headers", "content", "encoding"
+
+    def __init__(self, status_code:int, reason:str, url:str, headers, content:bytes, encoding:str):
+        self.status_code = status_code
+        self.reason = reason
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+class AsyncSession:
+    "Carries out standalone API calls asynchronously and handles all requested resources."
+
+    def __init__(self, host:str, limit:int=100, limit_per_host:int=0):
+        self.host = host
+        self.auth_id:int = None
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self._s:aiohttp.ClientSession = None
+        self._cached:dict[int, AsyncProject|AsyncProfile] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        "Closes the underlying connection pool."
+        if self._s is not None:
+            await self._s.close()
+            self._s = None
+
+    async def _request(self, method:str, url:str, **kwargs):
+        if self._s is None:
+            #aiohttp sessions must be created from within a running event loop
+            self._s = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host))
+        async with self._s.request(method, url, **kwargs) as r:
+            content = await r.read()
+            return _Result(r.status, r.reason, str(r.url), r.headers, content, r.get_encoding() if content else None)
+
+    def clear_cache(self):
+        "Clears the cache of all constructed objects."
+        self._cached.clear()
+
+    async def new_auth(self, password:str):
+        "Creates a new Auth ID given a password."
+        r = await self._request("POST", f"{self.host}/auth/new", data={"password":password})
+        if r.status_code == 200:
+            id = int(r.text)
+            if id != self.auth_id:
+                self._cached.clear()
+            self.auth_id = id
+            return responses.AuthResponse(r, self.auth_id)
+        elif r.status_code == 400:
+            return responses.InvalidInputResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def authenticate(self, id:int, password:str):
+        "Authenticates the session given an Auth ID and password."
+        r = await self._request("POST", f"{self.host}/auth/set", data={"id":str(id), "password":password})
+        if r.status_code == 200:
+            if id != self.auth_id:
+                self._cached.clear()
+            self.auth_id = id
+            return responses.SuccessResponse(r)
+        elif r.status_code == 401:
+            return responses.InvalidAuthResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def get_project(self, name:str):
+        "Gets a Project with the given name."
+        r = await self._request("GET", f"{self.host}/project/get?name={sessions._param(name)}")
+        if r.status_code == 200:
+            return responses.ProjectResponse(r, _merge(self, r.json(), lambda data: AsyncProject.from_data(data, self)))
+        elif r.status_code == 403:
+            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
+        elif r.status_code == 404:
+            return responses.NotFoundResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def register_project(self, name:str, permissions:dict[int, permissions_.ProjectPermissions]=None, **fields):
+        "Registers a new Project."
+        fields["permissions"] = None if permissions is None else {auth_id:perm.value for auth_id, perm in permissions.items()}
+        r = await self._request("POST", f"{self.host}/project/register", data={
+            "name":name,
+            "fields":json.dumps(fields)
+        })
+        if r.status_code == 200:
+            return responses.SuccessResponse(r)
+        elif r.status_code == 400:
+            return responses.InvalidInputResponse(r)
+        elif r.status_code == 401:
+            return responses.InvalidAuthResponse(r)
+        elif r.status_code == 403:
+            if r.text.startswith("Already a Project"):
+                return responses.AlreadyExistsResponse(r)
+            else:
+                return responses.InvalidInputResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+def _merge(session:AsyncSession, data:dict[str], create):
+    #cached objects are updated in place, so each Project and Profile has a single instance per session
+    id = sessions._b64_id(data["id"])
+    obj = session._cached.get(id)
+    if obj is None:
+        obj = session._cached[id] = create(data)
+    else:
+        obj._from_data(data)
+    return obj
+
+class AsyncProject(projects.BaseProject):
+    "Allows for making asynchronous API calls having to do with an individual Project."
+
+    __slots__ = ()
+
+    async def update(self):
+        "Update this Project object with the latest data on the server."
+        r = await self.session._request("GET", f"{self.session.host}/project/get?name={sessions._param(self.name)}")
+        if r.status_code == 200:
+            data:dict[str] = r.json()
+            if sessions._b64_id(data["id"]) != self.id:
+                self.session._cached.pop(self.id, None)
+                raise exceptions.OutOfDateException(f"Project {self.name} has changed its name.")
+            self._from_data(data)
+            return responses.SuccessResponse(r)
+        elif r.status_code == 403:
+            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
+        elif r.status_code == 404:
+            return responses.NotFoundResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def edit(self, name:str=None, permissions:dict[int, permissions_.ProjectPermissions]=None, **fields):
+        "Edit this Project's attributes (e.g. name, permissions)."
+        fields["name"] = name
+        fields["permissions"] = None if permissions is None else {id:perm.value for id, perm in permissions.items()}
+        r = await self.session._request("POST", f"{self.session.host}/project/edit", data={
+            "name":self.name,
+            "fields":json.dumps(fields)
+        })
+        if r.status_code == 200:
+            if name is not None:
+                self.name = name
+            if permissions is not None:
+                for auth_id, perm in permissions.items():
+                    self.permissions[auth_id] = perm
+            return responses.SuccessResponse(r)
+        elif r.status_code == 400:
+            return responses.InvalidInputResponse(r)
+        elif r.status_code == 403:
+            if r.text.startswith("Already a Project"):
+                return responses.AlreadyExistsResponse(r)
+            elif r.text.startswith("Cannot give permissions"):
+                for each in permissions_.ProjectPermissions:
+                    if each.name in r.text:
+                        return responses.InvalidPermissionResponse(r, each)
+                return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions(0))
+            else:
+                return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions(0))
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def delete(self):
+        "Delete this Project and all of its Profiles."
+        r = await self.session._request("DELETE", f"{self.session.host}/project/delete?name={sessions._param(self.name)}")
+        if r.status_code == 200:
+            self.session._cached.pop(self.id, None)
+            return responses.SuccessResponse(r)
+        elif r.status_code == 403:
+            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.DELETE)
+        elif r.status_code == 404:
+            return responses.NotFoundResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def get_profile(self, name:str):
+        "Get a Profile belonging to this Project."
+        r = await self.session._request("GET", f"{self.session.host}/project/profile/get?name={sessions._param(self.name)}&profile_name={sessions._param(name)}")
+        if r.status_code == 200:
+            return responses.ProfileResponse(r, [_merge(self.session, r.json(), lambda data: AsyncProfile.from_data(data, self, self.session))])
+        elif r.status_code == 403:
+            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
+        elif r.status_code == 404 and "Profile" in r.text:
+            return responses.NotFoundResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def get_all_profiles(self):
+        "Get all Profiles belonging to this Project."
+        r = await self.session._request("GET", f"{self.session.host}/project/profile/all?name={sessions._param(self.name)}")
+        if r.status_code == 200:
+            create = lambda data: AsyncProfile.from_data(data, self, self.session)
+            return responses.ProfileResponse(r, [_merge(self.session, data, create) for data in r.json()])
+        elif r.status_code == 403:
+            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def add_profile(self, name:str, permissions:dict[int, permissions_.ProfilePermissions]=None, **fields):
+        "Add a Profile to this Project."
+        fields["permissions"] = None if permissions is None else {auth_id:perm.value for auth_id, perm in permissions.items()}
+        r = await self.session._request("POST", f"{self.session.host}/project/profile/add", data={
+            "name":self.name,
+            "profile_name":name,
+            "fields":json.dumps(fields)
+        })
+        if r.status_code == 200:
+            return responses.SuccessResponse(r)
+        elif r.status_code == 400:
+            return responses.InvalidInputResponse(r)
+        elif r.status_code == 401:
+            return responses.InvalidAuthResponse(r)
+        elif r.status_code == 403:
+            if r.text.startswith("Already a Profile"):
+                return responses.AlreadyExistsResponse(r)
+            else:
+                return responses.InvalidInputResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def remove_profile(self, name:str):
+        "Remove the Profile with the given name from this Project."
+        r = await self.session._request("POST", f"{self.session.host}/project/profile/remove?name={sessions._param(self.name)}&profile_name={sessions._param(name)}")
+        if r.status_code == 200:
+            return responses.SuccessResponse(r)
+        elif r.status_code == 403:
+            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.DELETE)
+        elif r.status_code == 404 and "Profile" in r.text:
+            return responses.NotFoundResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def read_profiles(self, names:"list[str]", max_concurrency:int=8):
+        "Read the contents of many Profiles belonging to this Project concurrently. Returns a dict mapping each Profile name to its response."
+        names = list(names)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        async def read(name:str):
+            async with semaphore:
+                return await _profile_read(self.session, self.name, name)
+        return dict(zip(names, await asyncio.gather(*map(read, names))))
+
+    async def write_profiles(self, contents:"dict[str, bytes]", max_concurrency:int=8):
+        "Write the contents of many Profiles belonging to this Project concurrently. Returns a dict mapping each Profile name to its response."
+        url = f"{self.session.host}/project/profile/write"
+        semaphore = asyncio.Semaphore(max_concurrency)
+        async def write(name:str, b:bytes):
+            async with semaphore:
+                return await _profile_write(self.session, self.name, name, b, url)
+        return dict(zip(contents, await asyncio.gather(*(write(name, b) for name, b in contents.items()))))
+
+class AsyncProfile(profiles.BaseProfile):
+    "Allows for making asynchronous API calls having to do with an individual Profile."
+
+    __slots__ = ()
+
+    async def update(self):
+        "Update this Profile object with the latest data on the server."
+        r = await self.session._request("GET", f"{self.session.host}/project/profile/get?name={sessions._param(self.project.name)}&profile_name={sessions._param(self.name)}")
+        if r.status_code == 200:
+            data = r.json()
+            if sessions._b64_id(data["id"]) != self.id:
+                self.session._cached.pop(self.id, None)
+                raise exceptions.OutOfDateException(f"Profile {self.name} has changed its name.")
+            self._from_data(data)
+            return responses.SuccessResponse(r)
+        elif r.status_code == 403:
+            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
+        elif r.status_code == 404 and "Profile" in r.text:
+            return responses.NotFoundResponse(r)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def remove(self):
+        "Delete this Profile and remove it from its Project."
+        resp = await self.project.remove_profile(self.name)
+        if isinstance(resp, (responses.SuccessResponse, responses.NotFoundResponse)):
+            self.session._cached.pop(self.id, None)
+        return resp
+
+    async def edit(self, name:str=None, permissions:dict[int, permissions_.ProfilePermissions]=None, **fields):
+        "Edit this Profile's attributes (e.g. name, permissions)."
+        fields["name"] = name
+        fields["permissions"] = None if permissions is None else {id:perm.value for id, perm in permissions.items()}
+        r = await self.session._request("POST", f"{self.session.host}/project/edit", data={
+            "name":self.project.name,
+            "profile_name":self.name,
+            "fields":json.dumps(fields)
+        })
+        if r.status_code == 200:
+            if name is not None:
+                self.name = name
+            if permissions is not None:
+                for auth_id, perm in permissions.items():
+                    self.permissions[auth_id] = perm
+            return responses.SuccessResponse(r)
+        elif r.status_code == 400:
+            return responses.InvalidInputResponse(r)
+        elif r.status_code == 403:
+            if r.text.startswith("Already a Profile"):
+                return responses.AlreadyExistsResponse(r)
+            elif r.text.startswith("Cannot give permissions"):
+                for each in permissions_.ProjectPermissions:
+                    if each.name in r.text:
+                        return responses.InvalidPermissionResponse(r, each)
+                return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions(0))
+            else:
+                return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions(0))
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
+    async def read(self, offset:int=None, length:int=None):
+        "Read this Profile's contents, optionally limited to a byte range (offset, length)."
+        return await _profile_read(self.session, self.project.name, self.name, offset, length)
+
+    async def write(self, b:bytes|io.IOBase):
+        "Write to this Profile's contents."
+        return await _profile_write(self.session, self.project.name, self.name, b, f"{self.session.host}/project/profile/write")
+
+    async def append(self, b:bytes|io.IOBase):
+        "Append to this Profile's contents."
+        return await _profile_write(self.session, self.project.name, self.name, b, f"{self.session.host}/project/profile/append")
+
+
+
+async def _profile_read(session:AsyncSession, project_name:str, profile_name:str, offset:int=None, length:int=None):
+    headers = profiles._range_header(offset, length)
+    r = await session._request("GET", f"{session.host}/project/profile/read?name={sessions._param(project_name)}&profile_name={sessions._param(profile_name)}", headers=headers)
+    if r.status_code == 200:
+        #if the server ignored the Range header, the range is applied locally instead
+        return responses.ProfileContentResponse(r, offset or 0, length)
+    elif r.status_code == 206:
+        return responses.ProfileContentResponse(r)
+    elif r.status_code == 416:
+        return responses.InvalidInputResponse(r)
+    elif r.status_code == 403:
+        return responses.InvalidPermissionResponse(r, permissions_.ProfilePermissions.READ)
+    elif r.status_code == 404 and "Profile" in r.text:
+        return responses.NotFoundResponse(r)
+    else:
+        return responses.UnexpectedErrorResponse(r)
+
+async def _profile_write(session:AsyncSession, project_name:str, profile_name:str, b, url:str):
+    if isinstance(b, io.IOBase) and not b.readable():
+        raise TypeError("Given IO object must be readable.")
+    form = aiohttp.FormData()
+    form.add_field("name", project_name)
+    form.add_field("profile_name", profile_name)
+    form.add_field("data", b, filename="data")
+    r = await session._request("POST", url, data=form)
+    if r.status_code == 200:
+        return responses.RemainingSpaceResponse(r, int(r.text))
+    elif r.status_code == 403:
+        return responses.InvalidPermissionResponse(r, permissions_.ProfilePermissions.WRITE)
+    elif r.status_code == 400 and "Profile" in r.text:
+        return responses.NotFoundResponse(r)
+    else:
+        return responses.UnexpectedErrorResponse(r)
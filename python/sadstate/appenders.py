@@ -0,0 +1,97 @@
+from . import exceptions, profiles, responses
+import threading
+import time
+
+class Appender:
+    "Coalesces many small appends to a Profile in memory, sending them as a single append once max_bytes are buffered, max_delay seconds have passed or the Appender is closed."
+
+    def __init__(self, profile:"profiles.Profile", max_bytes:int=65536, max_delay:float=1.0):
+        self.profile = profile
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self._buffer = bytearray()
+        self._first:float = None
+        self._closed = False
+        self._error:exceptions.FlushException = None
+        self._condition = threading.Condition()
+        #held for the whole of a flush so buffered data is always sent in order
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"sadstate-appender-{profile.name}", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def buffered(self):
+        return len(self._buffer)
+
+    def append(self, b:"bytes|memoryview"):
+        "Buffer a bytes-like object to be appended. Once max_bytes are buffered the caller sends them itself, blocking until the append completes."
+        data = memoryview(b).cast("B")
+        with self._condition:
+            self._raise_error()
+            if self._closed:
+                raise ValueError("Cannot append to a closed Appender.")
+            #compressed sizes are only known once sent, so space can only be checked for uncompressed contents
+            remaining = self.profile._remaining_space if self.profile.session.compression is None else None
+            if remaining is not None and len(self._buffer) + data.nbytes > remaining:
+                raise exceptions.InsufficientSpaceException(f"{len(self._buffer) + data.nbytes} buffered bytes do not fit in the {remaining} bytes left in Profile {self.profile.name}.")
+            if not self._buffer:
+                self._first = time.monotonic()
+                self._condition.notify()
+            self._buffer += data
+            full = len(self._buffer) >= self.max_bytes
+        if full:
+            self._flush()
+
+    def flush(self):
+        "Send everything buffered so far. Raises FlushException if this or an earlier background flush failed."
+        resp = self._flush()
+        with self._condition:
+            self._raise_error()
+        return resp
+
+    def close(self):
+        "Flush any buffered data and stop the background flush thread."
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        return self.flush()
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _flush(self):
+        with self._flush_lock:
+            with self._condition:
+                if not self._buffer:
+                    return None
+                data, self._buffer, self._first = bytes(self._buffer), bytearray(), None
+            try:
+                resp = self.profile.append(data)
+            except Exception as e:
+                raise exceptions.FlushException(f"Could not append {len(data)} buffered bytes to Profile {self.profile.name}.", data) from e
+            if not isinstance(resp, responses.RemainingSpaceResponse):
+                raise exceptions.FlushException(f"Could not append {len(data)} buffered bytes to Profile {self.profile.name}.", data, resp)
+            return resp
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (self._first is None or time.monotonic() - self._first < self.max_delay):
+                    self._condition.wait(None if self._first is None else self._first + self.max_delay - time.monotonic())
+                if self._closed:
+                    return
+            try:
+                self._flush()
+            except exceptions.FlushException as e:
+                #surfaced by the next append, flush or close
+                with self._condition:
+                    self._error = e
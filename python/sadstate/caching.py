@@ -0,0 +1,323 @@
+from . import profiles
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import time
+
+class CacheEntry:
+    "A cached Project or Profile along with the data needed to decide whether it is still fresh."
+
+    __slots__ = "value", "key", "response", "expires", "etag", "last_modified"
+
+    def __init__(self, value, response=None, ttl:float=None):
+        self.value = value
+        self.key = None
+        self.response = response
+        self.etag = self.last_modified = None
+        self.refresh(response, ttl)
+
+    def refresh(self, response, ttl:float=None):
+        "Restart this entry's TTL, keeping any validators sent with the given response."
+        self.expires = None if ttl is None else time.monotonic() + ttl
+        if response is not None:
+            self.response = response
+            self.etag = response.headers.get("ETag", self.etag)
+            self.last_modified = response.headers.get("Last-Modified", self.last_modified)
+
+    @property
+    def fresh(self):
+        return self.expires is not None and time.monotonic() < self.expires
+
+    @property
+    def validators(self):
+        "Conditional request headers which let the server answer 304 if this entry is unchanged."
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class MetadataCache:
+    "LRU cache of constructed Project and Profile objects keyed by id, with optional per-entry TTL and conditional revalidation. Objects are also indexed by name so lookups by name can be answered locally."
+
+    def __init__(self, ttl:float=None, max_size:int=None, revalidate:bool=False):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.revalidate = revalidate
+        self.hits = self.misses = self.revalidations = 0
+        #guards the entries, the index and mutation of cached objects
+        self.lock = threading.RLock()
+        self._entries:OrderedDict[int, CacheEntry] = OrderedDict()
+        #(project name,) or (project id, profile name) -> id
+        self._index:dict[tuple, int] = {}
+
+    @staticmethod
+    def _key(value):
+        if isinstance(value, profiles.Profile):
+            return (value.project.id, value.name)
+        return (value.name,)
+
+    def __len__(self):
+        with self.lock:
+            return len(self._entries)
+
+    def __contains__(self, id:int):
+        with self.lock:
+            return id in self._entries
+
+    def __getitem__(self, id:int):
+        with self.lock:
+            self._entries.move_to_end(id)
+            return self._entries[id].value
+
+    def __setitem__(self, id:int, value):
+        self.store(id, value)
+
+    def store(self, id:int, value, response=None):
+        "Caches value under id, restarting its TTL and recording validators from response."
+        with self.lock:
+            entry = self._entries.get(id)
+            if entry is None or entry.value is not value:
+                if entry is not None:
+                    self._unindex(id, entry)
+                entry = self._entries[id] = CacheEntry(value, response, self.ttl)
+            else:
+                entry.refresh(response, self.ttl)
+            self.reindex(id)
+            self._entries.move_to_end(id)
+            if self.max_size is not None:
+                while len(self._entries) > self.max_size:
+                    self._unindex(*self._entries.popitem(last=False))
+
+    def merge(self, id:int, data:dict[str], create, response=None):
+        "Updates the cached object for id from response data, or caches the object returned by create(data). Returns the cached object."
+        with self.lock:
+            entry = self._entries.get(id)
+            if entry is None:
+                value = create(data)
+            else:
+                value = entry.value
+                value._from_data(data)
+            self.store(id, value, response)
+            return value
+
+    def reindex(self, id:int):
+        "Updates the name index for a cached object, e.g. after it has been renamed."
+        with self.lock:
+            entry = self._entries.get(id)
+            if entry is not None:
+                key = self._key(entry.value)
+                if key != entry.key:
+                    self._unindex(id, entry)
+                    entry.key = key
+                    self._index[key] = id
+
+    def _unindex(self, id:int, entry:CacheEntry):
+        if self._index.get(entry.key) == id:
+            del self._index[entry.key]
+
+    def find(self, name:str, project=None):
+        "Returns the id of the cached Project with the given name, or of the cached Profile with the given name in project, or None."
+        with self.lock:
+            return self._index.get((name,) if project is None else (project.id, name))
+
+    def lookup(self, name:str, project=None):
+        "Finds a cached Project (or a Profile in project) by name, returning its CacheEntry (or None) and whether it is fresh. Counts a hit or a miss."
+        with self.lock:
+            id = self.find(name, project)
+            entry = None if id is None else self._entries[id]
+            if entry is not None and entry.fresh:
+                self.hits += 1
+                self._entries.move_to_end(id)
+                return entry, True
+            self.misses += 1
+            return entry, False
+
+    def conditional_headers(self, entry:CacheEntry):
+        "Returns the headers to send when refetching a stale entry."
+        if entry is None or not self.revalidate:
+            return None
+        return entry.validators
+
+    def revalidated(self, entry:CacheEntry):
+        "Marks a stale entry as confirmed unchanged by the server."
+        with self.lock:
+            self.revalidations += 1
+            self.store(entry.value.id, entry.value)
+
+    def pop(self, id:int, *default):
+        with self.lock:
+            entry = self._entries.pop(id, None)
+            if entry is None:
+                if default:
+                    return default[0]
+                raise KeyError(id)
+            self._unindex(id, entry)
+            return entry.value
+
+    def pop_project(self, id:int):
+        "Removes a Project and all of its cached Profiles."
+        with self.lock:
+            for key in [key for key in self._index if len(key) == 2 and key[0] == id]:
+                self.pop(self._index[key])
+            self.pop(id, None)
+
+    def values(self):
+        with self.lock:
+            return [entry.value for entry in self._entries.values()]
+
+    def items(self):
+        "Returns (id, CacheEntry) pairs from least to most recently used."
+        with self.lock:
+            return list(self._entries.items())
+
+    def expire(self, id:int, expires:float):
+        "Sets when the entry for id stops being fresh, as a time.monotonic() value (None if it has no TTL)."
+        with self.lock:
+            self._entries[id].expires = expires
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def stats(self):
+        "Returns the cache's size and hit/miss/revalidation counters."
+        with self.lock:
+            return {"size":len(self._entries), "hits":self.hits, "misses":self.misses, "revalidations":self.revalidations}
+
+class ContentCache:
+    """Size-bounded cache of Profile contents keyed by (host, Project id, Profile id). Contents are kept in an in-memory LRU and, if a directory is given, in files on disk.
+    The cache only sees writes made through sessions using it, so changes made by other clients are not noticed until an entry's ttl runs out or the Profile is update()d."""
+
+    def __init__(self, max_memory:int=64 * 2**20, directory:str=None, max_disk:int=2**30, ttl:float=None):
+        self.max_memory = max_memory
+        self.directory = directory
+        self.max_disk = max_disk
+        self.ttl = ttl
+        self.hits = self.misses = 0
+        self.lock = threading.RLock()
+        #entries are keyed by a digest of their key, which also names their file on disk
+        self._memory:OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._memory_size = 0
+        self._disk:OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._disk_size = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            files = [entry for entry in os.scandir(directory) if entry.name.endswith(".bin") and len(entry.name) == 36]
+            for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+                stat = entry.stat()
+                self._disk[entry.name[:-4]] = stat.st_size, stat.st_mtime
+                self._disk_size += stat.st_size
+
+    @staticmethod
+    def _digest(key:tuple):
+        return hashlib.blake2b("\0".join(map(str, key)).encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, digest:str):
+        return os.path.join(self.directory, f"{digest}.bin")
+
+    def _expired(self, stored:float):
+        return self.ttl is not None and time.time() - stored > self.ttl
+
+    def get(self, key:tuple):
+        "Returns the cached contents for a key as bytes, or None."
+        digest = self._digest(key)
+        with self.lock:
+            if digest in self._memory and not self._expired(self._memory[digest][1]):
+                self.hits += 1
+                self._memory.move_to_end(digest)
+                return self._memory[digest][0]
+            if digest in self._disk and not self._expired(self._disk[digest][1]):
+                self.hits += 1
+                self._disk.move_to_end(digest)
+                with open(self._path(digest), "rb") as f:
+                    return f.read()
+            self._drop(digest)
+            self.misses += 1
+            return None
+
+    def put(self, key:tuple, content:bytes):
+        "Caches the full contents of a Profile."
+        digest = self._digest(key)
+        stored = time.time()
+        with self.lock:
+            self._drop(digest)
+            if len(content) <= self.max_memory:
+                self._memory[digest] = content, stored
+                self._memory_size += len(content)
+                self._evict_memory()
+            if self.directory is not None and len(content) <= self.max_disk:
+                temp = self._path(digest) + ".tmp"
+                with open(temp, "wb") as f:
+                    f.write(content)
+                os.replace(temp, self._path(digest))
+                self._disk[digest] = len(content), stored
+                self._disk_size += len(content)
+                self._evict_disk()
+
+    def append(self, key:tuple, content:bytes):
+        "Extends the cached contents of a Profile, if they are cached. Files on disk are appended to in place, and no hit or miss is counted."
+        digest = self._digest(key)
+        with self.lock:
+            memory, disk = self._memory.get(digest), self._disk.get(digest)
+            if memory is not None and self._expired(memory[1]) or disk is not None and self._expired(disk[1]):
+                self._drop(digest)
+                return
+            if memory is not None:
+                current, stored = self._memory.pop(digest)
+                self._memory_size -= len(current)
+                if len(current) + len(content) <= self.max_memory:
+                    self._memory[digest] = current + content, stored
+                    self._memory_size += len(current) + len(content)
+                    self._evict_memory()
+            if disk is not None:
+                size, stored = disk
+                if size + len(content) > self.max_disk:
+                    del self._disk[digest]
+                    self._disk_size -= size
+                    os.remove(self._path(digest))
+                    return
+                with open(self._path(digest), "ab") as f:
+                    f.write(content)
+                self._disk[digest] = size + len(content), stored
+                self._disk.move_to_end(digest)
+                self._disk_size += len(content)
+                self._evict_disk()
+
+    def _evict_memory(self):
+        while self._memory_size > self.max_memory:
+            self._memory_size -= len(self._memory.popitem(last=False)[1][0])
+
+    def _evict_disk(self):
+        while self._disk_size > self.max_disk:
+            evicted, (size, _) = self._disk.popitem(last=False)
+            self._disk_size -= size
+            os.remove(self._path(evicted))
+
+    def invalidate(self, key:tuple):
+        "Drops the cached contents of a Profile."
+        with self.lock:
+            self._drop(self._digest(key))
+
+    def _drop(self, digest:str):
+        if digest in self._memory:
+            self._memory_size -= len(self._memory.pop(digest)[0])
+        if digest in self._disk:
+            self._disk_size -= self._disk.pop(digest)[0]
+            os.remove(self._path(digest))
+
+    def clear(self):
+        with self.lock:
+            for digest in list(self._disk):
+                os.remove(self._path(digest))
+            self._memory.clear()
+            self._disk.clear()
+            self._memory_size = self._disk_size = 0
+
+    def stats(self):
+        "Returns the cache's sizes and hit/miss counters."
+        with self.lock:
+            return {"memory_bytes":self._memory_size, "disk_bytes":self._disk_size, "hits":self.hits, "misses":self.misses}
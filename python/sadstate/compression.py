@@ -0,0 +1,122 @@
+import io
+import lzma
+import zlib
+
+#every compressed frame starts with MAGIC, a codec id and the level it was compressed at
+MAGIC = b"SDZ"
+HEADER_SIZE = len(MAGIC) + 2
+
+ZLIB = 1
+LZMA = 2
+
+_CODECS = {"zlib":ZLIB, "lzma":LZMA}
+
+def _compressor(codec:int, level:int):
+    if codec == ZLIB:
+        return zlib.compressobj(level)
+    return lzma.LZMACompressor(preset=level)
+
+def _decompressor(codec:int):
+    if codec == ZLIB:
+        return zlib.decompressobj()
+    elif codec == LZMA:
+        return lzma.LZMADecompressor()
+    raise ValueError(f"Unknown compression codec {codec}.")
+
+def _level_byte(codec:int, level:int):
+    #the level is only informational, so it is squeezed into one byte: zlib levels as a signed byte, lzma presets with their PRESET_EXTREME flag in the top bit
+    if codec == ZLIB:
+        if not -1 <= level <= 9:
+            raise ValueError(f"zlib compression level must be between -1 and 9, not {level}.")
+        return level & 0xFF
+    if not 0 <= level & ~lzma.PRESET_EXTREME <= 9:
+        raise ValueError(f"lzma preset must be between 0 and 9, optionally combined with lzma.PRESET_EXTREME, not {level}.")
+    return level & 0x0F | (0x80 if level & lzma.PRESET_EXTREME else 0)
+
+class Codec:
+    """Compresses Profile payloads into self-delimiting frames, so compressed appends can be concatenated and decoded as one stream.
+    Turning compression on for a Profile which already has uncompressed contents requires rewriting them, since appended frames after raw bytes are not decoded."""
+
+    __slots__ = "codec", "level", "chunk_size", "_level_byte"
+
+    def __init__(self, name:str="zlib", level:int=6, chunk_size:int=65536):
+        if name not in _CODECS:
+            raise ValueError(f"Unknown compression codec {name!r}, expected one of {', '.join(_CODECS)}.")
+        self.codec = _CODECS[name]
+        self.level = level
+        self.chunk_size = chunk_size
+        self._level_byte = _level_byte(self.codec, level)
+
+    @property
+    def header(self):
+        return MAGIC + bytes((self.codec, self._level_byte))
+
+    def compress(self, data)->bytes:
+        "Compresses a bytes-like object into a single frame."
+        compressor = _compressor(self.codec, self.level)
+        return self.header + compressor.compress(data) + compressor.flush()
+
+    def compress_stream(self, chunks):
+        "Compresses an iterable of chunks into a single frame, yielding compressed chunks as they are produced."
+        compressor = _compressor(self.codec, self.level)
+        yield self.header
+        for chunk in chunks:
+            if compressed := compressor.compress(chunk):
+                yield compressed
+        yield compressor.flush()
+
+    def encode(self, b):
+        "Compresses a Profile payload (bytes-like, readable file or iterable of chunks), keeping bytes-like payloads bytes-like so their size stays known."
+        if isinstance(b, io.IOBase):
+            return self.compress_stream(iter(lambda: b.read(self.chunk_size), b""))
+        try:
+            return self.compress(memoryview(b))
+        except TypeError:
+            return self.compress_stream(b)
+
+class Decompressor:
+    """Incrementally decodes Profile contents made of compressed frames. Contents which do not start with a frame header are passed through unchanged, including any frames appended after them.
+    Uncompressed contents which happen to start with a valid frame header cannot be told apart from a frame and fail to decode with a ValueError."""
+
+    def __init__(self):
+        self._pending = b""
+        self._decoder = None
+        self._raw = False
+
+    def decompress(self, data)->bytes:
+        out = []
+        data = self._pending + bytes(data)
+        self._pending = b""
+        while data:
+            if self._raw:
+                out.append(data)
+                break
+            if self._decoder is None:
+                if len(data) < HEADER_SIZE and MAGIC.startswith(data[:len(MAGIC)]):
+                    #wait for the rest of a possible frame header
+                    self._pending = data
+                    break
+                if not data.startswith(MAGIC) or data[len(MAGIC)] not in _CODECS.values():
+                    self._raw = True
+                    continue
+                self._decoder = _decompressor(data[len(MAGIC)])
+                data = data[HEADER_SIZE:]
+            try:
+                out.append(self._decoder.decompress(data))
+            except (zlib.error, lzma.LZMAError) as e:
+                raise ValueError("Contents start like a compressed frame but cannot be decoded.") from e
+            if self._decoder.eof:
+                data = self._decoder.unused_data
+                self._decoder = None
+            else:
+                data = b""
+        return b"".join(out)
+
+    def flush(self)->bytes:
+        pending, self._pending = self._pending, b""
+        return pending
+
+def decompress(data)->bytes:
+    "Decodes complete Profile contents."
+    decompressor = Decompressor()
+    return decompressor.decompress(data) + decompressor.flush()
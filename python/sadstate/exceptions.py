@@ -1,2 +1,17 @@
 class OutOfDateException(Exception):
-    "Exception for cached resources which can no longer be updated in the same object."
\ No newline at end of file
+    "Exception for cached resources which can no longer be updated in the same object."
+
+class InsufficientSpaceException(Exception):
+    "Exception for payloads which are known not to fit in a Profile's remaining space."
+
+
+class CircuitOpenException(Exception):
+    "Exception for requests refused locally because their host has failed too many times recently."
+
+class FlushException(Exception):
+    "Exception for buffered appends which could not be sent to a Profile. The unsent bytes are kept in data."
+
+    def __init__(self, message:str, data:bytes, response=None):
+        super().__init__(message)
+        self.data = data
+        self.response = response
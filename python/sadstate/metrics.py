@@ -0,0 +1,155 @@
+from collections import defaultdict
+import bisect
+import threading
+import urllib.parse
+
+class Histogram:
+    "A fixed-bucket histogram of observed values."
+
+    __slots__ = "bounds", "counts", "sum", "count"
+
+    def __init__(self, bounds:"tuple[float, ...]"):
+        self.bounds = bounds
+        #one count per bound, plus one for values above the last bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value:float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q:float):
+        "Returns the upper bound of the bucket containing the q-th quantile (inf if it is above every bound), or None if nothing has been observed."
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        return {
+            "count":self.count,
+            "sum":self.sum,
+            "buckets":dict(zip([*self.bounds, float("inf")], self.counts)),
+            "p50":self.quantile(0.5),
+            "p99":self.quantile(0.99),
+        }
+
+class Instrumentation:
+    "Collects per-endpoint request metrics for a Session and runs hooks around each request: pre hooks as hook(method, url, kwargs) and post hooks as hook(method, url, response, elapsed), with response None if the request raised."
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets:"tuple[float, ...]"=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.pre_hooks = []
+        self.post_hooks = []
+        #named objects with a stats() method returning hits and misses, e.g. the Session's caches
+        self.caches = {}
+        self._lock = threading.Lock()
+        self._latency:dict[str, Histogram] = {}
+        self._bytes_out:defaultdict[str, int] = defaultdict(int)
+        self._bytes_in:defaultdict[str, int] = defaultdict(int)
+        self._errors:defaultdict[str, int] = defaultdict(int)
+        self._results:defaultdict[tuple[str, str], int] = defaultdict(int)
+
+    def add_pre_hook(self, hook):
+        self.pre_hooks.append(hook)
+
+    def add_post_hook(self, hook):
+        self.post_hooks.append(hook)
+
+    @staticmethod
+    def endpoint(url:str):
+        return urllib.parse.urlsplit(url).path
+
+    def before(self, method:str, url:str, kwargs:dict):
+        for hook in self.pre_hooks:
+            hook(method, url, kwargs)
+
+    def after(self, method:str, url:str, response, elapsed:float, stream:bool=False):
+        "Records a finished request. response is None if the request raised."
+        endpoint = self.endpoint(url)
+        with self._lock:
+            if endpoint not in self._latency:
+                self._latency[endpoint] = Histogram(self.buckets)
+            self._latency[endpoint].observe(elapsed)
+            if response is None:
+                self._errors[endpoint] += 1
+            else:
+                self._bytes_out[endpoint] += _body_size(response.request.body)
+                length = response.headers.get("Content-Length")
+                if length is not None and length.isdigit():
+                    self._bytes_in[endpoint] += int(length)
+                elif not stream:
+                    self._bytes_in[endpoint] += len(response.content)
+        for hook in self.post_hooks:
+            hook(method, url, response, elapsed)
+
+    def record_result(self, result):
+        "Counts a responses.Response by endpoint and type."
+        with self._lock:
+            self._results[self.endpoint(result.response.url), result.response_name] += 1
+
+    def snapshot(self):
+        "Returns all collected metrics as a dict."
+        with self._lock:
+            endpoints = {
+                endpoint:{
+                    "latency":histogram.snapshot(),
+                    "bytes_out":self._bytes_out[endpoint],
+                    "bytes_in":self._bytes_in[endpoint],
+                    "errors":self._errors[endpoint],
+                    "results":{name:count for (other, name), count in self._results.items() if other == endpoint},
+                }
+                for endpoint, histogram in self._latency.items()
+            }
+        caches = {}
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            lookups = stats["hits"] + stats["misses"]
+            caches[name] = {**stats, "hit_ratio":stats["hits"] / lookups if lookups else None}
+        return {"endpoints":endpoints, "caches":caches}
+
+    def prometheus(self, prefix:str="sadstate"):
+        "Returns all collected metrics in the Prometheus text exposition format."
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_request_duration_seconds histogram"]
+        for endpoint, data in snapshot["endpoints"].items():
+            cumulative = 0
+            for bound, count in data["latency"]["buckets"].items():
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_request_duration_seconds_sum{{endpoint="{endpoint}"}} {data["latency"]["sum"]}')
+            lines.append(f'{prefix}_request_duration_seconds_count{{endpoint="{endpoint}"}} {data["latency"]["count"]}')
+        for metric, key in (("request_bytes_sent_total", "bytes_out"), ("response_bytes_received_total", "bytes_in"), ("request_errors_total", "errors")):
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for endpoint, data in snapshot["endpoints"].items():
+                lines.append(f'{prefix}_{metric}{{endpoint="{endpoint}"}} {data[key]}')
+        lines.append(f"# TYPE {prefix}_responses_total counter")
+        for endpoint, data in snapshot["endpoints"].items():
+            for name, count in data["results"].items():
+                lines.append(f'{prefix}_responses_total{{endpoint="{endpoint}",type="{name}"}} {count}')
+        for metric in ("hits", "misses"):
+            lines.append(f"# TYPE {prefix}_cache_{metric}_total counter")
+            for name, stats in snapshot["caches"].items():
+                lines.append(f'{prefix}_cache_{metric}_total{{cache="{name}"}} {stats[metric]}')
+        return "\n".join(lines) + "\n"
+
+def _body_size(body):
+    if body is None:
+        return 0
+    length = getattr(body, "len", None)
+    if length is not None:
+        return length
+    try:
+        return len(body)
+    except TypeError:
+        return 0
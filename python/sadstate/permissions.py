@@ -37,4 +37,8 @@ class ProfilePermissions(Flag):
     
     @classmethod
     def all(cls):
-        return _flag_all(cls)
\ No newline at end of file
+        return _flag_all(cls)
+
+def effective(permissions:"dict[int, ProjectPermissions|ProfilePermissions]", auth_id:int):
+    "Returns the permissions auth_id is listed with in a Project's or Profile's permissions dict, or None if it has no entry (the server may still grant it permissions, e.g. as the owner)."
+    return permissions.get(auth_id)
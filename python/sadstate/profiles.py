@@ -1,19 +1,21 @@
-from . import exceptions, permissions as permissions_, projects, responses, sessions
+from . import appenders, exceptions, permissions as permissions_, projects, responses, sessions, streams
 import io
 import json
 import weakref
 
-class Profile:
-    "Allows for making API calls having to do with an individual Profile."
+class BaseProfile:
+    "The data of a Profile, shared by the synchronous and asynchronous clients."
 
-    __slots__ = "id", "name", "permissions", "_project", "_session", "__weakref__"
+    __slots__ = "id", "name", "permissions", "_project", "_session", "_remaining_space", "_capacity", "__weakref__"
 
     @classmethod
     def from_data(cls, data:dict[str], project:"projects.Project", session:"sessions.Session"):
         "Construct a new Profile object from response data."
         instance = cls.__new__(cls)
-        instance._project = weakref.ref(project)
+        #held strongly, so a Project evicted from the session's cache stays usable through its Profiles
+        instance._project = project
         instance._session = weakref.ref(session)
+        instance._remaining_space = instance._capacity = None
         instance._from_data(data)
         return instance
 
@@ -30,31 +32,47 @@ class Profile:
         self.id = id
         self.name = name
         self.permissions = permissions
-        self._project = weakref.ref(project)
+        self._project = project
         self._session = weakref.ref(session)
+        self._remaining_space = self._capacity = None
 
     def __eq__(self, other):
-        if isinstance(other, Profile):
+        if isinstance(other, BaseProfile):
             return other.name == self.name
         return super().__eq__(other)
 
     @property
     def project(self):
-        return self._project()
+        return self._project
     
     @property
     def session(self):
         return self._session()
+
+class Profile(BaseProfile):
+    "Allows for making API calls having to do with an individual Profile."
+
+    __slots__ = ()
+
+    @property
+    def _content_key(self):
+        #Profile ids are only unique within a server
+        return self.session.host, self.project.id, self.id
     
     def update(self):
         "Update this Profile object with the latest data on the server."
         r = self.session._s.get(f"{self.session.host}/project/profile/get?name={sessions._param(self.project.name)}&profile_name={sessions._param(self.name)}")
         if r.status_code == 200:
             data = r.json()
-            if data["id"] != self.id:
-                self.session._cached.pop(self.id)
-                raise exceptions.OutOfDateException(f"Project {self.name} has changed its name.")
-            self._from_data()
+            if sessions._b64_id(data["id"]) != self.id:
+                self.session._cached.pop(self.id, None)
+                raise exceptions.OutOfDateException(f"Profile {self.name} has changed its name.")
+            with self.session._cached.lock:
+                self._from_data(data)
+                self.session._cached.store(self.id, self, r)
+            #the contents may have been changed by another client too
+            if self.session.content_cache is not None:
+                self.session.content_cache.invalidate(self._content_key)
             return responses.SuccessResponse(r)
         elif r.status_code == 403:
             return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
@@ -68,25 +86,28 @@ class Profile:
         resp = self.project.remove_profile(self.name)
         if isinstance(resp, (responses.SuccessResponse, responses.NotFoundResponse)):
             self.session._cached.pop(self.id, None)
+            if self.session.content_cache is not None:
+                self.session.content_cache.invalidate(self._content_key)
         return resp
     
     def edit(self, name:str=None, permissions:dict[int, permissions_.ProfilePermissions]=None, **fields):
         "Edit this Profile's attributes (e.g. name, permissions)."
 
         fields["name"] = name
-        fields["permissions"] = {id:perm.value for id, perm in permissions.items()}
+        fields["permissions"] = None if permissions is None else {id:perm.value for id, perm in permissions.items()}
         r = self.session._s.post(f"{self.session.host}/project/edit", data={
             "name":self.project.name,
             "profile_name":self.name,
             "fields":json.dumps(fields)
         })
         if r.status_code == 200:
-            name = fields.get("name")
-            if name is not None:
-                self.name = name
-            if permissions is not None:
-                for auth_id, perm in permissions.items():
-                    self.permissions[auth_id] = perm
+            with self.session._cached.lock:
+                if name is not None:
+                    self.name = name
+                    self.session._cached.reindex(self.id)
+                if permissions is not None:
+                    #replaced rather than mutated so other threads never see a dict changing size
+                    self.permissions = {**self.permissions, **permissions}
             return responses.SuccessResponse(r)
         elif r.status_code == 400:
             return responses.InvalidInputResponse(r)
@@ -104,35 +125,113 @@ class Profile:
         else:
             return responses.UnexpectedErrorResponse(r)
 
-    def read(self):
-        "Read this Profile's contents."
-        r = self.session._s.get(f"{self.session.host}/project/profile/read?name={sessions._param(self.project.name)}&profile_name={sessions._param(self.name)}")
-        if r.status_code == 200:
-            return responses.ProfileContentResponse(r)
-        elif r.status_code == 403:
-            return responses.InvalidPermissionResponse(r, permissions_.ProfilePermissions.READ)
-        elif r.status_code == 404 and "Profile" in r.text:
-            return responses.NotFoundResponse(r)
-        else:
-            return responses.UnexpectedErrorResponse(r)
+    def read(self, stream:bool=False, offset:int=None, length:int=None, into=None):
+        "Read this Profile's contents, optionally streamed, written straight into a file or buffer (into), or limited to a byte range (offset, length). Served from the session's content cache if it has one."
+        if (denied := self.session._preflight(self, permissions_.ProfilePermissions.READ)) is not None:
+            return denied
+        cache = self.session.content_cache
+        #ranges address the stored bytes, so buffers only limit the range requested when contents are not compressed
+        if into is not None and length is None and not hasattr(into, "write") and self.session.compression is None:
+            length = memoryview(into).nbytes
+            if not length:
+                #nothing fits, and an empty range cannot be requested
+                return responses.BytesReadResponse(responses.ResponseRecord(200, b""), 0)
+        _check_range(offset, length)
+        if cache is not None and not stream:
+            content = cache.get(self._content_key)
+            if content is not None:
+                if (offset is not None or length is not None) and (offset or 0) >= len(content):
+                    #answered the way the server answers a range starting past the end
+                    return responses.InvalidInputResponse(responses.ResponseRecord(416, b"Range not satisfiable (checked locally)."))
+                resp = responses.ProfileContentResponse(responses.ResponseRecord(200, content), offset or 0, length, _decodes(self.session, offset, length))
+                return responses.BytesReadResponse(resp.response, resp.readinto(into)) if into is not None else resp
+        resp = _profile_read(self.session, self.project.name, self.name, stream or into is not None, offset, length)
+        if into is not None and isinstance(resp, responses.ProfileContentResponse):
+            return responses.BytesReadResponse(resp.response, resp.readinto(into))
+        if cache is not None and not stream and offset is None and length is None and isinstance(resp, responses.ProfileContentResponse):
+            cache.put(self._content_key, resp.response.content)
+        return resp
     
-    def write(self, b:bytes|io.IOBase):
-        "Write to this Profile's contents."
-        return _profile_write(self, b, f"{self.session.host}/project/profile/write")
+    def write(self, b:"bytes|memoryview|io.IOBase|Iterable[bytes]", check_space:bool=False):
+        "Write to this Profile's contents. With check_space, payloads known not to fit in the Profile are rejected before being sent."
+        return self._write(b, "write", check_space)
 
-    def append(self, b:bytes|io.IOBase):
-        "Append to this Profile's contents."
-        return _profile_write(self, b, f"{self.session.host}/project/profile/append")
+    def append(self, b:"bytes|memoryview|io.IOBase|Iterable[bytes]", check_space:bool=False):
+        "Append to this Profile's contents. With check_space, payloads known not to fit in the Profile are rejected before being sent."
+        return self._write(b, "append", check_space)
 
+    def appender(self, max_bytes:int=65536, max_delay:float=1.0):
+        "Get an Appender which coalesces many small appends to this Profile into fewer requests. Use it as a context manager or close() it so buffered data is sent."
+        return appenders.Appender(self, max_bytes, max_delay)
 
+    def _write(self, b, endpoint:str, check_space:bool):
+        if (denied := self.session._preflight(self, permissions_.ProfilePermissions.WRITE)) is not None:
+            return denied
+        b = _encode(self.session, b)
+        size = streams.payload_size(b)
+        if check_space and size is not None:
+            available = self._capacity if endpoint == "write" else self._remaining_space
+            if available is not None and size > available:
+                raise exceptions.InsufficientSpaceException(f"Payload of {size} bytes does not fit in the {available} bytes available to Profile {self.name}.")
+        resp = _profile_write(self.session, self.project.name, self.name, b, f"{self.session.host}/project/profile/{endpoint}")
+        if isinstance(resp, responses.RemainingSpaceResponse):
+            self._remaining_space = resp.num_bytes
+            if endpoint == "write":
+                self._capacity = None if size is None else size + resp.num_bytes
+            cache = self.session.content_cache
+            if cache is not None:
+                #streamed payloads have been consumed, so only bytes-like payloads can be written through
+                if size is None or isinstance(b, io.IOBase):
+                    cache.invalidate(self._content_key)
+                elif endpoint == "write":
+                    cache.put(self._content_key, bytes(b))
+                else:
+                    cache.append(self._content_key, bytes(b))
+        return resp
+
+
+
+def _check_range(offset:int, length:int):
+    if offset is not None and offset < 0 or length is not None and length < 1:
+        raise ValueError("offset must be non-negative and length must be positive.")
+
+def _range_header(offset:int, length:int):
+    if offset is None and length is None:
+        return {}
+    _check_range(offset, length)
+    offset = offset or 0
+    return {"Range":f"bytes={offset}-{'' if length is None else offset + length - 1}"}
+
+def _decodes(session:"sessions.Session", offset:int, length:int):
+    #only whole contents can be decompressed
+    return session.compression is not None and offset is None and length is None
+
+def _encode(session:"sessions.Session", b):
+    return b if session.compression is None else session.compression.encode(b)
+
+def _profile_read(session:"sessions.Session", project_name:str, profile_name:str, stream:bool=False, offset:int=None, length:int=None):
+    headers = _range_header(offset, length)
+    r = session._s.get(f"{session.host}/project/profile/read?name={sessions._param(project_name)}&profile_name={sessions._param(profile_name)}", headers=headers, stream=stream)
+    if r.status_code == 200:
+        #if the server ignored the Range header, the range is applied locally instead
+        return responses.ProfileContentResponse(r, offset or 0, length, _decodes(session, offset, length))
+    elif r.status_code == 206:
+        return responses.ProfileContentResponse(r)
+    elif r.status_code == 416:
+        return responses.InvalidInputResponse(r)
+    elif r.status_code == 403:
+        return responses.InvalidPermissionResponse(r, permissions_.ProfilePermissions.READ)
+    elif r.status_code == 404 and "Profile" in r.text:
+        return responses.NotFoundResponse(r)
+    else:
+        return responses.UnexpectedErrorResponse(r)
 
-def _profile_write(p, b, url):
-    if isinstance(b, io.IOBase) and not b.readable():
-        raise TypeError("Given IO object must be readable.")
-    r = p.session._s.post(url, data={
-        "name":p.project.name,
-        "profile_name":p.name
-    }, files={"data":io.BytesIO(b) if isinstance(b, bytes) else b})
+def _profile_write(session:"sessions.Session", project_name:str, profile_name:str, b, url:str):
+    body = streams.MultipartStream({
+        "name":project_name,
+        "profile_name":profile_name
+    }, b)
+    r = session._s.post(url, data=body, headers={"Content-Type":body.content_type})
     if r.status_code == 200:
         return responses.RemainingSpaceResponse(r, int(r.text))
     elif r.status_code == 403:
@@ -1,9 +1,9 @@
-from . import exceptions, permissions as permissions_, profiles, responses, sessions
+from . import exceptions, permissions as permissions_, profiles, responses, sessions, streams
 import json
 import weakref
 
-class Project:
-    "Allows for making API calls having to do with an individual Project."
+class BaseProject:
+    "The data of a Project, shared by the synchronous and asynchronous clients."
 
     __slots__ = "id", "name", "permissions", "_session", "__weakref__"
 
@@ -35,19 +35,26 @@ class Project:
         return self._session()
 
     def __eq__(self, other):
-        if isinstance(other, Project):
+        if isinstance(other, BaseProject):
             return other.name == self.name
         return super().__eq__(other)
+
+class Project(BaseProject):
+    "Allows for making API calls having to do with an individual Project."
+
+    __slots__ = ()
     
     def update(self):
         "Update this Project object with the latest data on the server."
         r = self.session._s.get(f"{self.session.host}/project/get?name={sessions._param(self.name)}")
         if r.status_code == 200:
             data:dict[str] = r.json()
-            if data["id"] != self.id:
-                self.session._cached.pop(self.id)
+            if sessions._b64_id(data["id"]) != self.id:
+                self.session._cached.pop(self.id, None)
                 raise exceptions.OutOfDateException(f"Project {self.name} has changed its name.")
-            self._from_data(data)
+            with self.session._cached.lock:
+                self._from_data(data)
+                self.session._cached.store(self.id, self, r)
             return responses.SuccessResponse(r)
         elif r.status_code == 403:
             return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
@@ -59,18 +66,19 @@ class Project:
     def edit(self, name:str=None, permissions:dict[int, permissions_.ProjectPermissions]=None, **fields):
         "Edit this Project's attributes (e.g. name, permissions)."
         fields["name"] = name
-        fields["permissions"] = {id:perm.value for id, perm in permissions.items()}
+        fields["permissions"] = None if permissions is None else {id:perm.value for id, perm in permissions.items()}
         r = self.session._s.post(f"{self.session.host}/project/edit", data={
             "name":self.name,
             "fields":json.dumps(fields)
         })
         if r.status_code == 200:
-            name = fields.get("name")
-            if name is not None:
-                self.name = name
-            if permissions is not None:
-                for auth_id, perm in permissions.items():
-                    self.permissions[auth_id] = perm
+            with self.session._cached.lock:
+                if name is not None:
+                    self.name = name
+                    self.session._cached.reindex(self.id)
+                if permissions is not None:
+                    #replaced rather than mutated so other threads never see a dict changing size
+                    self.permissions = {**self.permissions, **permissions}
             return responses.SuccessResponse(r)
         elif r.status_code == 400:
             return responses.InvalidInputResponse(r)
@@ -91,9 +99,11 @@ class Project:
 
     def delete(self):
         "Delete this Project and all of its Profiles."
+        if (denied := self.session._preflight(self, permissions_.ProjectPermissions.DELETE)) is not None:
+            return denied
         r = self.session._s.delete(f"{self.session.host}/project/delete?name={sessions._param(self.name)}")
         if r.status_code == 200:
-            self.session._cached.pop(self.id, None)
+            self.session._cached.pop_project(self.id)
             return responses.SuccessResponse(r)
         elif r.status_code == 403:
             return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.DELETE)
@@ -104,16 +114,19 @@ class Project:
         
 
     def get_profile(self, name:str):
-        "Get a Profile belonging to this Project."
-        r = self.session._s.get(f"{self.session.host}/project/profile/get?name={sessions._param(self.name)}&profile_name={sessions._param(name)}")
-        if r.status_code == 200:
+        "Get a Profile belonging to this Project. Cached Profiles are returned without a request until their TTL expires."
+        if (denied := self.session._preflight(self, permissions_.ProjectPermissions.VIEW)) is not None:
+            return denied
+        entry, fresh = self.session._cached.lookup(name, self)
+        if fresh:
+            return responses.ProfileResponse(entry.response, [entry.value])
+        r = self.session._s.get(f"{self.session.host}/project/profile/get?name={sessions._param(self.name)}&profile_name={sessions._param(name)}", headers=self.session._cached.conditional_headers(entry))
+        if r.status_code == 304 and entry is not None:
+            self.session._cached.revalidated(entry)
+            return responses.ProfileResponse(entry.response, [entry.value])
+        elif r.status_code == 200:
             data = r.json()
-            id = sessions._b64_id(data["id"])
-            if id in self.session._cached:
-                prof = self.session._cached[id]
-                prof._from_data(data)
-            else:
-                prof = self.session._cached[id] = profiles.Profile.from_data(data, self, self.session)
+            prof = self.session._cached.merge(sessions._b64_id(data["id"]), data, lambda data: profiles.Profile.from_data(data, self, self.session), r)
             return responses.ProfileResponse(r, [prof])
         elif r.status_code == 403:
             return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
@@ -124,17 +137,38 @@ class Project:
         
     def get_all_profiles(self):
         "Get all Profiles belonging to this Project."
+        if (denied := self.session._preflight(self, permissions_.ProjectPermissions.VIEW)) is not None:
+            return denied
         r = self.session._s.get(f"{self.session.host}/project/profile/all?name={sessions._param(self.name)}")
         if r.status_code == 200:
-            return responses.ProfileResponse(r, [profiles.Profile.from_data(data, self, self.session) for data in r.json()])
+            #listings populate the cache so later get_profile() calls can be answered locally
+            create = lambda data: profiles.Profile.from_data(data, self, self.session)
+            return responses.ProfileResponse(r, [self.session._cached.merge(sessions._b64_id(data["id"]), data, create, r) for data in r.json()])
         elif r.status_code == 403:
             return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
         else:
             return responses.UnexpectedErrorResponse(r)
         
+    def iter_profiles(self, chunk_size:int=65536):
+        "Lazily iterate over all Profiles belonging to this Project. The listing is streamed and parsed chunk_size bytes at a time, and already cached Profile objects are reused."
+        if (denied := self.session._preflight(self, permissions_.ProjectPermissions.VIEW)) is not None:
+            return denied
+        r = self.session._s.get(f"{self.session.host}/project/profile/all?name={sessions._param(self.name)}", stream=True)
+        if r.status_code == 200:
+            create = lambda data: profiles.Profile.from_data(data, self, self.session)
+            def iterate():
+                with r:
+                    for data in streams.iter_json_array(r.iter_content(chunk_size)):
+                        yield self.session._cached.merge(sessions._b64_id(data["id"]), data, create, r)
+            return responses.ProfileStreamResponse(r, iterate())
+        elif r.status_code == 403:
+            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
+        else:
+            return responses.UnexpectedErrorResponse(r)
+
     def add_profile(self, name:str, permissions:dict[int, permissions_.ProfilePermissions]=None, **fields):
         "Add a Profile to this Project."
-        fields["permissions"] = None if permissions is None else {auth_id:perm for auth_id, perm in permissions.items()}
+        fields["permissions"] = None if permissions is None else {auth_id:perm.value for auth_id, perm in permissions.items()}
         r = self.session._s.post(f"{self.session.host}/project/profile/add", data={
             "name":self.name,
             "profile_name":name,
@@ -156,12 +190,49 @@ class Project:
         
     def remove_profile(self, name:str):
         "Remove the Profile with the given name from this Project."
+        if (denied := self.session._preflight(self, permissions_.ProjectPermissions.REMOVE_PROFILE)) is not None:
+            return denied
         r = self.session._s.post(f"{self.session.host}/project/profile/remove?name={sessions._param(self.name)}&profile_name={sessions._param(name)}")
         if r.status_code == 200:
+            id = self.session._cached.find(name, self)
+            if id is not None:
+                self.session._cached.pop(id)
             return responses.SuccessResponse(r)
         elif r.status_code == 403:
-            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.DELETE)
+            return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.REMOVE_PROFILE)
         elif r.status_code == 404 and "Profile" in r.text:
             return responses.NotFoundResponse(r)
         else:
-            return responses.UnexpectedErrorResponse(r)
\ No newline at end of file
+            return responses.UnexpectedErrorResponse(r)
+
+    def _cached_profile(self, name:str):
+        id = self.session._cached.find(name, self)
+        return None if id is None else self.session._cached[id]
+
+    def _batch_profiles(self, names:"list[str]"):
+        #Profiles found here are read and written through Profile.read()/write(), so the content cache and space tracking stay up to date
+        found = {name:prof for name in names if (prof := self._cached_profile(name)) is not None}
+        if self.session.content_cache is not None and len(found) < len(names):
+            #contents may be cached under the id of a Profile evicted from the metadata cache, so the rest are resolved with one listing
+            resp = self.get_all_profiles()
+            if resp:
+                found.update({prof.name:prof for prof in resp.profiles if prof.name in names and prof.name not in found})
+        return found
+
+    def read_profiles(self, names:"list[str]", max_workers:int=None):
+        "Read the contents of many Profiles belonging to this Project concurrently. Returns a dict mapping each Profile name to its response."
+        names = list(names)
+        found = self._batch_profiles(names)
+        def read(name:str):
+            prof = found.get(name)
+            return profiles._profile_read(self.session, self.name, name) if prof is None else prof.read()
+        return dict(zip(names, self.session.map(read, names, max_workers)))
+
+    def write_profiles(self, contents:"dict[str, bytes]", max_workers:int=None):
+        "Write the contents of many Profiles belonging to this Project concurrently. Returns a dict mapping each Profile name to its response."
+        url = f"{self.session.host}/project/profile/write"
+        found = self._batch_profiles(list(contents))
+        def write(item:"tuple[str, bytes]"):
+            prof = found.get(item[0])
+            return profiles._profile_write(self.session, self.name, item[0], profiles._encode(self.session, item[1]), url) if prof is None else prof.write(item[1])
+        return dict(zip(contents, self.session.map(write, contents.items(), max_workers)))
\ No newline at end of file
@@ -0,0 +1,192 @@
+from . import permissions as permissions_, profiles, projects, responses, sessions
+from dataclasses import dataclass, field
+
+#actions run in this order, since each phase depends on resources created by the one before it
+PHASES = (
+    ("register_project",),
+    ("edit_project", "add_profile"),
+    ("edit_profile", "write_profile"),
+)
+
+@dataclass(slots=True)
+class Action:
+    "A single call needed to bring the server in line with a provisioning spec."
+    kind:str
+    project:str
+    profile:str = None
+    permissions:"dict[int, permissions_.ProjectPermissions|permissions_.ProfilePermissions]" = None
+    content:bytes = None
+    #the Project or Profile acted on, once known, so running the action needs no extra lookups
+    target:"projects.Project|profiles.Profile" = field(default=None, repr=False, compare=False)
+    #set once the action has been run
+    response:"responses.Response" = None
+    error:Exception = None
+
+    @property
+    def failed(self):
+        return self.error is not None or self.response is not None and not self.response
+
+    def __str__(self):
+        target = self.project if self.profile is None else f"{self.project}/{self.profile}"
+        details = []
+        if self.permissions:
+            details.append(", ".join(f"{auth_id}={perm.name}" for auth_id, perm in self.permissions.items()))
+        if self.content is not None:
+            details.append(f"{len(self.content)} bytes")
+        return f"{self.kind} {target}" + (f" ({'; '.join(details)})" if details else "")
+
+@dataclass(slots=True)
+class Result:
+    "The outcome of Session.apply(): the planned actions, each with its response once run, and whether created resources were rolled back."
+    actions:list[Action] = field(default_factory=list)
+    dry_run:bool = False
+    rolled_back:bool = False
+
+    @property
+    def failed(self):
+        return [action for action in self.actions if action.failed]
+
+    def plan(self):
+        "Returns a human readable list of the planned actions."
+        return "\n".join(map(str, self.actions))
+
+    def __bool__(self):
+        return not self.rolled_back and not self.failed
+
+def plan(session:"sessions.Session", spec:dict[str, dict], max_workers:int=None):
+    """Diffs spec against the server, returning the Actions needed to apply it. spec maps Project names to
+    {"permissions": {auth_id: ProjectPermissions}, "profiles": {name: {"permissions": {auth_id: ProfilePermissions}, "content": bytes}}},
+    where every key is optional. Permissions are only ever added or changed, and contents are only written if they differ."""
+    found = dict(zip(spec, session.map(session.get_project, spec, max_workers)))
+    actions:list[Action] = []
+    existing:list[str] = []
+    for name, project_spec in spec.items():
+        resp = found[name]
+        if isinstance(resp, responses.NotFoundResponse):
+            actions.append(Action("register_project", name, permissions=project_spec.get("permissions")))
+            for profile_name, profile_spec in project_spec.get("profiles", {}).items():
+                actions += _new_profile(name, profile_name, profile_spec)
+        elif not resp:
+            raise ValueError(f"Cannot plan Project {name}: {resp.response_name} [{resp.code}].")
+        else:
+            if changed := _changed(resp.project.permissions, project_spec.get("permissions")):
+                actions.append(Action("edit_project", name, permissions=changed, target=resp.project))
+            existing.append(name)
+
+    listings = dict(zip(existing, session.map(lambda name: found[name].project.get_all_profiles(), existing, max_workers)))
+    reads:"list[tuple[profiles.Profile, str, bytes]]" = []
+    for name in existing:
+        if not listings[name]:
+            raise ValueError(f"Cannot plan the Profiles of Project {name}: {listings[name].response_name} [{listings[name].code}].")
+        current = {prof.name:prof for prof in listings[name].profiles}
+        for profile_name, profile_spec in spec[name].get("profiles", {}).items():
+            prof = current.get(profile_name)
+            if prof is None:
+                actions += _new_profile(name, profile_name, profile_spec, found[name].project)
+                continue
+            if changed := _changed(prof.permissions, profile_spec.get("permissions")):
+                actions.append(Action("edit_profile", name, profile_name, permissions=changed, target=prof))
+            if profile_spec.get("content") is not None:
+                reads.append((prof, name, profile_spec["content"]))
+
+    #contents of existing Profiles are compared so only those which differ are rewritten
+    def differs(item:"tuple"):
+        resp = item[0].read()
+        return not resp or resp.content != item[2]
+    for (prof, name, content), write in zip(reads, session.map(differs, reads, max_workers)):
+        if write:
+            actions.append(Action("write_profile", name, prof.name, content=content, target=prof))
+    return actions
+
+def apply(session:"sessions.Session", spec:dict[str, dict], dry_run:bool=False, max_workers:int=None):
+    "Applies spec (see plan()), running the Actions of each phase concurrently. If any Action fails, the Projects and Profiles created so far are removed again. With dry_run, only the plan is returned."
+    result = Result(plan(session, spec, max_workers), dry_run)
+    if dry_run:
+        return result
+    for kinds in PHASES:
+        phase = [action for action in result.actions if action.kind in kinds]
+        _resolve(session, result, phase, max_workers)
+        session.map(lambda action: _run(session, action), [action for action in phase if not action.failed], max_workers)
+        if result.failed:
+            _rollback(session, result, max_workers)
+            break
+    return result
+
+def _changed(current:dict, wanted:dict):
+    if not wanted:
+        return None
+    return {auth_id:perm for auth_id, perm in wanted.items() if current.get(auth_id) != perm}
+
+def _new_profile(project:str, name:str, spec:dict, target:"projects.Project"=None):
+    yield Action("add_profile", project, name, permissions=spec.get("permissions"), target=target)
+    if spec.get("content"):
+        yield Action("write_profile", project, name, content=spec["content"])
+
+def _projects(result:Result):
+    known = {}
+    for action in result.actions:
+        if isinstance(action.target, projects.Project):
+            known[action.project] = action.target
+        elif isinstance(action.target, profiles.Profile):
+            known[action.project] = action.target.project
+    return known
+
+def _resolve(session:"sessions.Session", result:Result, phase:list[Action], max_workers:int=None):
+    #objects created by earlier phases are looked up once each: one get_project() per new Project and one listing per Project with new Profiles
+    pending = [action for action in phase if action.target is None and action.kind != "register_project"]
+    if not pending:
+        return
+    known = _projects(result)
+    missing = list({action.project for action in pending if action.project not in known})
+    for name, resp in zip(missing, session.map(session.get_project, missing, max_workers)):
+        if resp:
+            known[name] = resp.project
+    needed = list({action.project for action in pending if action.kind in ("edit_profile", "write_profile") and action.project in known})
+    listings = dict(zip(needed, session.map(lambda name: known[name].get_all_profiles(), needed, max_workers)))
+    for action in pending:
+        project = known.get(action.project)
+        if project is None:
+            action.error = LookupError(f"Project {action.project} could not be found.")
+        elif action.kind in ("edit_project", "add_profile"):
+            action.target = project
+        elif listings[action.project]:
+            action.target = next((prof for prof in listings[action.project].profiles if prof.name == action.profile), None)
+            if action.target is None:
+                action.error = LookupError(f"Profile {action.project}/{action.profile} could not be found.")
+        else:
+            action.response = listings[action.project]
+
+def _run(session:"sessions.Session", action:Action):
+    try:
+        action.response = _call(session, action)
+    except Exception as e:
+        action.error = e
+
+def _call(session:"sessions.Session", action:Action):
+    if action.kind == "register_project":
+        return session.register_project(action.project, action.permissions)
+    elif action.kind == "edit_project":
+        return action.target.edit(permissions=action.permissions)
+    elif action.kind == "add_profile":
+        return action.target.add_profile(action.profile, action.permissions)
+    elif action.kind == "edit_profile":
+        return action.target.edit(permissions=action.permissions)
+    return action.target.write(action.content)
+
+def _rollback(session:"sessions.Session", result:Result, max_workers:int=None):
+    created = [action for action in result.actions if action.kind in ("register_project", "add_profile") and action.response]
+    registered = {action.project for action in created if action.kind == "register_project"}
+    known = _projects(result)
+    def undo(action:Action):
+        project = known.get(action.project)
+        if project is None:
+            resp = session.get_project(action.project)
+            if not resp:
+                return resp
+            project = resp.project
+        if action.kind == "register_project":
+            return project.delete()
+        return project.remove_profile(action.profile)
+    #Profiles added to newly registered Projects are deleted along with them
+    session.map(undo, [action for action in created if action.kind == "register_project" or action.project not in registered], max_workers)
+    result.rolled_back = True
@@ -1,11 +1,68 @@
-from . import permissions, profiles, projects
+from . import compression, permissions
 from dataclasses import dataclass
-import requests
+import functools
+import json
+import typing
+
+#only needed for annotations, so importing responses stays cheap
+if typing.TYPE_CHECKING:
+    from . import profiles, projects
+    import requests
+
+class ResponseRecord:
+    "A compact stand-in for a requests.Response, keeping only its status code, URL, body and cache validators. Its text is decoded once, when first used."
+
+    __slots__ = "status_code", "url", "content", "headers", "encoding", "instrumentation", "_text"
+
+    #the only headers the client reads from responses
+    HEADERS = "ETag", "Last-Modified", "Retry-After"
+
+    def __init__(self, status_code:int, content=b"", url:str=None, headers:dict[str, str]=None, encoding:str=None):
+        self.status_code = status_code
+        self.content = content
+        self.url = url
+        self.headers = headers or {}
+        self.encoding = encoding
+        self.instrumentation = None
+        self._text:str = None
+
+    @classmethod
+    def from_response(cls, r:"requests.Response"):
+        "Construct a ResponseRecord from a complete requests.Response."
+        return cls(r.status_code, r.content, r.url, {name:r.headers[name] for name in cls.HEADERS if name in r.headers}, r.encoding)
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = bytes(self.content).decode(self.encoding or "utf-8", errors="replace")
+        return self._text
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size:int=65536):
+        view = memoryview(self.content)
+        for i in range(0, len(view), chunk_size):
+            yield view[i:i + chunk_size]
+
+    def close(self):
+        pass
 
 @dataclass(slots=True)
 class Response:
     "Base class for API responses."
-    response:requests.Response
+    response:"requests.Response|ResponseRecord"
+
+    def __post_init__(self):
+        instrumentation = getattr(self.response, "instrumentation", None)
+        if instrumentation is not None:
+            #counted once, so responses reused for cache hits are not counted again
+            self.response.instrumentation = None
+            instrumentation.record_result(self)
 
     @property
     def response_name(self):
@@ -50,27 +107,105 @@ class ProfileResponse(SuccessResponse):
     def profile(self):
         return self.profiles[0] if self.profiles else None
     
+@dataclass(slots=True)
+class ProfileStreamResponse(SuccessResponse):
+    "A response lazily yielding Profiles as they are parsed from a streamed listing."
+    profiles:"Iterator[profiles.Profile]"
+
+    def __iter__(self):
+        return self.profiles
+
 @dataclass(slots=True)
 class RemainingSpaceResponse(SuccessResponse):
     "A response containing the number of bytes left unused in a Profile."
 
     num_bytes:int
 
-    
+
+@dataclass(slots=True)
 class ProfileContentResponse(SuccessResponse):
     "A response containing the contents of a Profile."
 
+    #bytes of the body still to be skipped/limited locally when the server ignored a requested Range
+    skip:int = 0
+    limit:int = None
+    #whether the contents may hold compressed frames written by a session with compression enabled
+    compressed:bool = False
+
     @property
     def content(self):
-        return self.response.content
+        content = self.response.content
+        if self.skip or self.limit is not None:
+            return content[self.skip:None if self.limit is None else self.skip + self.limit]
+        if self.compressed:
+            return compression.decompress(content)
+        return content
+
+    def iter_content(self, chunk_size:int=65536):
+        "Iterate over the contents in chunks without loading them entirely into memory (requires a streamed read)."
+        if self.compressed:
+            decompressor = compression.Decompressor()
+            for chunk in self._iter_range(chunk_size):
+                if chunk := decompressor.decompress(chunk):
+                    yield chunk
+            if chunk := decompressor.flush():
+                yield chunk
+        else:
+            yield from self._iter_range(chunk_size)
+
+    def _iter_range(self, chunk_size:int):
+        skip, limit = self.skip, self.limit
+        for chunk in self.response.iter_content(chunk_size):
+            if skip:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            if limit is not None:
+                if len(chunk) >= limit:
+                    if limit:
+                        yield chunk[:limit]
+                    break
+                limit -= len(chunk)
+            yield chunk
+
+    def readinto(self, target, chunk_size:int=65536):
+        "Read the contents directly into a writable file or buffer (e.g. bytearray, memoryview), returning the number of bytes read. Buffers are filled up to their length."
+        num_bytes = 0
+        if hasattr(target, "write"):
+            for chunk in self.iter_content(chunk_size):
+                target.write(chunk)
+                num_bytes += len(chunk)
+        else:
+            view = memoryview(target).cast("B")
+            for chunk in self.iter_content(chunk_size):
+                chunk = chunk[:len(view) - num_bytes]
+                view[num_bytes:num_bytes + len(chunk)] = chunk
+                num_bytes += len(chunk)
+                if num_bytes == len(view):
+                    break
+        self.close()
+        return num_bytes
+
+    def close(self):
+        "Release the connection held by a streamed read."
+        self.response.close()
+
+@dataclass(slots=True)
+class BytesReadResponse(SuccessResponse):
+    "A response containing the number of bytes of a Profile's contents read into a file or buffer."
+
+    num_bytes:int
 
 
 #not ok responses
 class ErrorResponse(Response):
     "An unsuccessful response."
 
-    @property
+    @functools.cached_property
     def reason(self):
+        #decoded once, since requests.Response decodes its text again on every access
         return self.response.text
 
 class UnexpectedErrorResponse(ErrorResponse):
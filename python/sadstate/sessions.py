@@ -1,7 +1,7 @@
-from . import permissions as permissions_, profiles, projects, responses
+from . import caching, compression as compression_, metrics, permissions as permissions_, profiles, projects, provisioning, responses, snapshots, transport, watching
 import base64
+import concurrent.futures
 import json
-import requests
 import urllib.parse
 
 
@@ -12,13 +12,69 @@ def _b64_id(id:str):
     return int.from_bytes(base64.b64decode(id.encode("utf-8")), "little")
 
 class Session:
-    "Carries out standalone API calls and handles all requested resources."
+    "Carries out standalone API calls and handles all requested resources. Safe to share between threads."
 
-    def __init__(self, host:str):
+    def __init__(self, host:str, cache_ttl:float=None, cache_size:int=None, revalidate:bool=False, content_cache:"caching.ContentCache"=None,
+                 pool_size:int=10, timeout:float=None, retries:int=0, backoff_factor:float=0.1, circuit_breaker:"transport.CircuitBreaker"=None,
+                 instrumentation:"metrics.Instrumentation"=None, compression:"compression_.Codec"=None, compact_responses:bool=False,
+                 preflight:bool=False):
         self.host = host
         self.auth_id:int = None
-        self._s = requests.Session()
-        self._cached:dict[int, projects.Project|profiles.Profile] = {}
+        self.compression = compression
+        self.preflight = preflight
+        self._s = transport.HTTPSession(pool_size, timeout, retries, backoff_factor, circuit_breaker=circuit_breaker, instrumentation=instrumentation, compact_responses=compact_responses)
+        self._cached = caching.MetadataCache(cache_ttl, cache_size, revalidate)
+        self.content_cache = content_cache
+        if instrumentation is not None:
+            instrumentation.caches["metadata"] = self._cached
+            if content_cache is not None:
+                instrumentation.caches["content"] = content_cache
+
+    @property
+    def instrumentation(self)->"metrics.Instrumentation":
+        "The Instrumentation collecting this session's request metrics, if any."
+        return self._s.instrumentation
+
+    @property
+    def cache(self):
+        "The cache of constructed Project and Profile objects."
+        return self._cached
+
+    def map(self, fn, items, max_workers:int=None):
+        "Calls fn on each item in parallel over this session's connection pool, returning the results in order. max_workers defaults to the pool size."
+        items = list(items)
+        with concurrent.futures.ThreadPoolExecutor(max_workers or self._s.pool_size) as pool:
+            return list(pool.map(fn, items))
+
+    def can(self, obj:"projects.Project|profiles.Profile", permission:"permissions_.ProjectPermissions|permissions_.ProfilePermissions"):
+        "Returns whether this session's Auth ID may hold permission on a Project or Profile according to its cached permissions, without a request. Only an entry for the Auth ID which lacks permission counts as a denial. ProjectPermissions asked of a Profile are checked against its Project."
+        if isinstance(permission, permissions_.ProjectPermissions) and isinstance(obj, profiles.Profile):
+            obj = obj.project
+        held = permissions_.effective(obj.permissions, self.auth_id)
+        return held is None or permission in held
+
+    def filter_readable(self, profiles_:"Iterable[profiles.Profile]"):
+        "Returns the given Profiles which this session's Auth ID can read according to their cached permissions."
+        auth_id, read = self.auth_id, permissions_.ProfilePermissions.READ
+        return [prof for prof in profiles_ if auth_id not in prof.permissions or read in prof.permissions[auth_id]]
+
+    def _preflight(self, obj:"projects.Project|profiles.Profile", permission:"permissions_.ProjectPermissions|permissions_.ProfilePermissions"):
+        #with preflight on, requests the cached permissions deny are refused locally with a synthetic 403
+        if self.preflight and self.auth_id is not None and not self.can(obj, permission):
+            return responses.InvalidPermissionResponse(responses.ResponseRecord(403, f"Missing {permission.name} permission (checked locally).".encode("utf-8")), permission)
+        return None
+
+    def save_state(self, path:str):
+        "Saves this session's Auth ID, cookies and cached Projects and Profiles to a compact binary file, so another process can start from them with load_state()."
+        snapshots.save(self, path)
+
+    def load_state(self, path:str, max_age:float=None):
+        "Restores state saved by save_state(), replacing this session's Auth ID and cache. Returns False if the file belongs to another host or is older than max_age seconds. Restored objects keep whatever TTL they had left."
+        return snapshots.load(self, path, max_age)
+
+    def watch(self, objects:"Iterable[projects.Project|profiles.Profile]", callback, **options):
+        "Starts watching Projects and Profiles for changes, calling callback(obj, change) only when one changes or is removed. Returns the running watching.Watcher; options are passed to it."
+        return watching.Watcher(self, objects, callback, **options).start()
 
     def clear_cache(self):
         "Clears the cache of all constructed objects."
@@ -52,16 +108,17 @@ class Session:
             return responses.UnexpectedErrorResponse(r)
         
     def get_project(self, name:str):
-        "Gets a Project with the given name."
-        r = self._s.get(f"{self.host}/project/get?name={_param(name)}")
-        if r.status_code == 200:
+        "Gets a Project with the given name. Cached Projects are returned without a request until their TTL expires."
+        entry, fresh = self._cached.lookup(name)
+        if fresh:
+            return responses.ProjectResponse(entry.response, entry.value)
+        r = self._s.get(f"{self.host}/project/get?name={_param(name)}", headers=self._cached.conditional_headers(entry))
+        if r.status_code == 304 and entry is not None:
+            self._cached.revalidated(entry)
+            return responses.ProjectResponse(entry.response, entry.value)
+        elif r.status_code == 200:
             data = r.json()
-            id = _b64_id(data["id"])
-            if id in self._cached:
-                proj = self._cached[id]
-                proj._from_data(data)
-            else:
-                proj = self._cached[id] = projects.Project.from_data(data, self)
+            proj = self._cached.merge(_b64_id(data["id"]), data, lambda data: projects.Project.from_data(data, self), r)
             return responses.ProjectResponse(r, proj)
         elif r.status_code == 403:
             return responses.InvalidPermissionResponse(r, permissions_.ProjectPermissions.VIEW)
@@ -70,6 +127,14 @@ class Session:
         else:
             return responses.UnexpectedErrorResponse(r)
 
+    def plan(self, spec:dict[str, dict], max_workers:int=None):
+        "Diffs a declarative spec of Projects, Profiles, permissions and contents against the server, returning the actions needed to apply it (see provisioning.plan())."
+        return provisioning.plan(self, spec, max_workers)
+
+    def apply(self, spec:dict[str, dict], dry_run:bool=False, max_workers:int=None):
+        "Brings the server in line with a declarative spec, making only the calls needed, concurrently, and removing anything it created if a call fails (see provisioning.apply())."
+        return provisioning.apply(self, spec, dry_run, max_workers)
+
     def register_project(self, name:str, permissions:dict[int, permissions_.ProjectPermissions]=None, **fields):
         "Registers a new Project."
         fields["permissions"] = None if permissions is None else {auth_id:perm.value for auth_id, perm in permissions.items()}
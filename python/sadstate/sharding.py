@@ -0,0 +1,116 @@
+from . import exceptions, permissions as permissions_, projects, responses, sessions, transport
+import bisect
+import hashlib
+import requests
+
+def _hash(key:str):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+class HashRing:
+    "Consistent hash ring mapping keys to hosts. Each host is placed at vnodes points on the ring, so keys spread evenly and adding or removing a host only moves that host's share of them."
+
+    __slots__ = "vnodes", "_points", "_hosts"
+
+    def __init__(self, hosts:"Iterable[str]"=(), vnodes:int=100):
+        self.vnodes = vnodes
+        #sorted (point, host) pairs
+        self._points:list[tuple[int, str]] = []
+        self._hosts:set[str] = set()
+        for host in hosts:
+            self.add(host)
+
+    def __len__(self):
+        return len(self._hosts)
+
+    def add(self, host:str):
+        if host in self._hosts:
+            return
+        self._hosts.add(host)
+        for i in range(self.vnodes):
+            bisect.insort(self._points, (_hash(f"{host}#{i}"), host))
+
+    def remove(self, host:str):
+        self._hosts.discard(host)
+        self._points = [point for point in self._points if point[1] != host]
+
+    def hosts_for(self, key:str, count:int=1):
+        "Returns up to count distinct hosts for key, its primary first, followed by the next hosts clockwise around the ring."
+        hosts = []
+        if not self._points:
+            return hosts
+        start = bisect.bisect(self._points, (_hash(key), ""))
+        for i in range(len(self._points)):
+            host = self._points[(start + i) % len(self._points)][1]
+            if host not in hosts:
+                hosts.append(host)
+                if len(hosts) == count:
+                    break
+        return hosts
+
+class ShardedSession:
+    "Spreads Projects across several hosts by consistent hashing of their names, with one Session (and connection pool) per host. Reads fail over to the next replicas hosts on the ring when a host errors. Projects returned are always bound to the Session of their own host, even when read from a replica."
+
+    #transport failures and server errors after which a read is retried on a replica
+    FAILOVER_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, exceptions.CircuitOpenException)
+
+    def __init__(self, hosts:"Iterable[str]", replicas:int=0, vnodes:int=100, **options):
+        self.replicas = replicas
+        self._options = options
+        self.ring = HashRing(vnodes=vnodes)
+        self.sessions:dict[str, sessions.Session] = {}
+        for host in hosts:
+            self.add_host(host)
+
+    def add_host(self, host:str):
+        "Adds a host to the ring. Only the Projects whose names now hash to it move."
+        options = dict(self._options)
+        breaker = options.get("circuit_breaker")
+        if breaker is not None:
+            #each host fails independently
+            options["circuit_breaker"] = transport.CircuitBreaker(breaker.failure_threshold, breaker.reset_timeout)
+        self.sessions[host] = sessions.Session(host, **options)
+        self.ring.add(host)
+
+    def remove_host(self, host:str):
+        self.ring.remove(host)
+        self.sessions.pop(host, None)
+
+    @property
+    def auth_id(self):
+        return next(iter(self.sessions.values())).auth_id if self.sessions else None
+
+    def session_for(self, name:str):
+        "Returns the Session of the host the Project with the given name belongs to."
+        return self.sessions[self.ring.hosts_for(name)[0]]
+
+    def authenticate(self, id:int, password:str):
+        "Authenticates every host's Session given an Auth ID and password, which must be valid on all hosts. Returns the first failure, if any."
+        results = next(iter(self.sessions.values())).map(lambda session: session.authenticate(id, password), self.sessions.values())
+        return next((resp for resp in results if not resp), results[0] if results else None)
+
+    def _read(self, name:str, call):
+        resp, error = None, None
+        for host in self.ring.hosts_for(name, 1 + self.replicas):
+            try:
+                resp = call(self.sessions[host])
+            except self.FAILOVER_EXCEPTIONS as e:
+                error = e
+                continue
+            if not (isinstance(resp, responses.UnexpectedErrorResponse) and resp.code >= 500):
+                return resp
+        if resp is None and error is not None:
+            raise error
+        return resp
+
+    def get_project(self, name:str):
+        "Gets a Project with the given name from its host, failing over to replicas if the host errors. A Project read from a replica is still bound to its own host, so calls made through it are never sent to the replica."
+        primary = self.session_for(name)
+        resp = self._read(name, lambda session: session.get_project(name))
+        if isinstance(resp, responses.ProjectResponse) and resp.project.session is not primary:
+            project = resp.project
+            resp.project = projects.Project(project.id, project.name, dict(project.permissions), primary)
+        return resp
+
+    def register_project(self, name:str, permissions:dict[int, permissions_.ProjectPermissions]=None, **fields):
+        "Registers a new Project on the host its name hashes to. Writes never fail over, so a Project is only ever created on its own host."
+        return self.session_for(name).register_project(name, permissions, **fields)
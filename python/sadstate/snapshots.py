@@ -0,0 +1,157 @@
+from . import permissions as permissions_, profiles, projects, responses, sessions
+import math
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"SADS"
+VERSION = 3
+
+#magic, version, whether an Auth ID is set, wall clock time saved at, Auth ID, cookie count, Project count, uncached Project count, Profile count
+_HEADER = struct.Struct("<4sH?dqIIII")
+_LENGTH = struct.Struct("<I")
+#secure, expires (NaN if none)
+_COOKIE = struct.Struct("<?d")
+#seconds of freshness left (NaN if the entry has no TTL) and permission count, preceded by the id (and for Profiles the Project id)
+_ENTRY = struct.Struct("<dH")
+#ids have no fixed width, so they are written as a length followed by their little-endian bytes
+_ID_LENGTH = struct.Struct("<B")
+#Auth ID, permission value
+_PERMISSION = struct.Struct("<qI")
+
+#length written in place of a string which is None
+_NONE = 0xFFFFFFFF
+
+def _pack_str(out:bytearray, value:str):
+    if value is None:
+        out += _LENGTH.pack(_NONE)
+    else:
+        encoded = value.encode("utf-8")
+        out += _LENGTH.pack(len(encoded))
+        out += encoded
+
+def _unpack_str(buffer, offset:int):
+    (length,) = _LENGTH.unpack_from(buffer, offset)
+    offset += _LENGTH.size
+    if length == _NONE:
+        return None, offset
+    return bytes(buffer[offset:offset + length]).decode("utf-8"), offset + length
+
+def _pack_id(out:bytearray, id:int):
+    encoded = id.to_bytes(max(1, (id.bit_length() + 7) // 8), "little")
+    out += _ID_LENGTH.pack(len(encoded))
+    out += encoded
+
+def _unpack_id(buffer, offset:int):
+    (length,) = _ID_LENGTH.unpack_from(buffer, offset)
+    offset += _ID_LENGTH.size
+    return int.from_bytes(buffer[offset:offset + length], "little"), offset + length
+
+def _remaining(entry, now:float):
+    return math.nan if entry.expires is None else entry.expires - now
+
+def save(session:"sessions.Session", path:str):
+    "Writes session's host, Auth ID, cookies and cached Projects and Profiles (with their permissions, validators and remaining TTL) to path. The file is replaced atomically."
+    with session._cached.lock:
+        entries = session._cached.items()
+    now = time.monotonic()
+    cookies = list(session._s.cookies)
+    cached_projects = [(id, entry) for id, entry in entries if isinstance(entry.value, projects.Project)]
+    cached_profiles = [(id, entry) for id, entry in entries if isinstance(entry.value, profiles.Profile)]
+    #Profiles keep their Project after it is evicted, so it is saved along with them without a cache entry of its own
+    cached_ids = {id for id, _ in cached_projects}
+    uncached_projects = list({entry.value.project.id:entry.value.project for _, entry in cached_profiles if entry.value.project.id not in cached_ids}.values())
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, session.auth_id is not None, time.time(), session.auth_id or 0, len(cookies), len(cached_projects), len(uncached_projects), len(cached_profiles)))
+    _pack_str(out, session.host)
+    for cookie in cookies:
+        for value in (cookie.name, cookie.value, cookie.domain, cookie.path):
+            _pack_str(out, value)
+        out += _COOKIE.pack(bool(cookie.secure), math.nan if cookie.expires is None else cookie.expires)
+    for id, entry in cached_projects:
+        _pack_id(out, id)
+        _pack_entry(out, entry.value, entry, now)
+    for project in uncached_projects:
+        _pack_id(out, project.id)
+        _pack_entry(out, project, None, now)
+    for id, entry in cached_profiles:
+        _pack_id(out, id)
+        _pack_id(out, entry.value.project.id)
+        _pack_entry(out, entry.value, entry, now)
+    temp = f"{path}.{os.getpid()}.tmp"
+    #the cookies authenticate the session, so only the owner may read the file
+    with open(os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+        f.write(out)
+    os.replace(temp, path)
+
+def _pack_entry(out:bytearray, obj, entry, now:float):
+    #objects without a cache entry are written with no TTL or validators
+    out += _ENTRY.pack(math.nan if entry is None else _remaining(entry, now), len(obj.permissions))
+    for value in (obj.name, None if entry is None else entry.etag, None if entry is None else entry.last_modified):
+        _pack_str(out, value)
+    for auth_id, perm in obj.permissions.items():
+        out += _PERMISSION.pack(auth_id, perm.value)
+
+def load(session:"sessions.Session", path:str, max_age:float=None):
+    "Restores state written by save() into session, replacing its Auth ID and cache. Returns False without changing anything if the file was saved for another host or more than max_age seconds ago."
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        magic, version, has_auth, saved_at, auth_id, num_cookies, num_projects, num_uncached, num_profiles = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a session state file of version {VERSION}.")
+        host, offset = _unpack_str(buffer, _HEADER.size)
+        age = time.time() - saved_at
+        if host != session.host or max_age is not None and age > max_age:
+            return False
+
+        cookies = []
+        for _ in range(num_cookies):
+            name, offset = _unpack_str(buffer, offset)
+            value, offset = _unpack_str(buffer, offset)
+            domain, offset = _unpack_str(buffer, offset)
+            path_, offset = _unpack_str(buffer, offset)
+            secure, expires = _COOKIE.unpack_from(buffer, offset)
+            offset += _COOKIE.size
+            cookies.append((name, value, {"domain":domain, "path":path_, "secure":secure, "expires":None if math.isnan(expires) else int(expires)}))
+
+        with session._cached.lock:
+            session._cached.clear()
+            now = time.monotonic()
+            loaded_projects = {}
+            for i in range(num_projects + num_uncached):
+                id, offset = _unpack_id(buffer, offset)
+                remaining, num_permissions = _ENTRY.unpack_from(buffer, offset)
+                offset += _ENTRY.size
+                name, etag, last_modified, perms, offset = _unpack_entry(buffer, offset, num_permissions, permissions_.ProjectPermissions)
+                project = loaded_projects[id] = projects.Project(id, name, perms, session)
+                if i < num_projects:
+                    _restore(session, id, project, etag, last_modified, remaining, age, now)
+            for _ in range(num_profiles):
+                id, offset = _unpack_id(buffer, offset)
+                project_id, offset = _unpack_id(buffer, offset)
+                remaining, num_permissions = _ENTRY.unpack_from(buffer, offset)
+                offset += _ENTRY.size
+                name, etag, last_modified, perms, offset = _unpack_entry(buffer, offset, num_permissions, permissions_.ProfilePermissions)
+                if project_id in loaded_projects:
+                    _restore(session, id, profiles.Profile(id, name, perms, loaded_projects[project_id], session), etag, last_modified, remaining, age, now)
+            session.auth_id = auth_id if has_auth else None
+
+    for name, value, attributes in cookies:
+        session._s.cookies.set(name, value, **attributes)
+    return True
+
+def _unpack_entry(buffer, offset:int, num_permissions:int, cls:type):
+    name, offset = _unpack_str(buffer, offset)
+    etag, offset = _unpack_str(buffer, offset)
+    last_modified, offset = _unpack_str(buffer, offset)
+    perms = {}
+    for _ in range(num_permissions):
+        auth_id, value = _PERMISSION.unpack_from(buffer, offset)
+        offset += _PERMISSION.size
+        perms[auth_id] = cls(value)
+    return name, etag, last_modified, perms, offset
+
+def _restore(session:"sessions.Session", id:int, value, etag:str, last_modified:str, remaining:float, age:float, now:float):
+    headers = {name:header for name, header in (("ETag", etag), ("Last-Modified", last_modified)) if header is not None}
+    #restored objects are returned with a stand-in for the response they were fetched with
+    session._cached.store(id, value, responses.ResponseRecord(200, b"", headers=headers))
+    session._cached.expire(id, None if math.isnan(remaining) else now + remaining - age)
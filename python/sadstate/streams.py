@@ -0,0 +1,95 @@
+import codecs
+import io
+import json
+import os
+import uuid
+
+def payload_size(b)->int|None:
+    "Returns the number of bytes the given payload will upload, or None if it cannot be known without consuming it."
+    if isinstance(b, io.IOBase):
+        if b.seekable():
+            position = b.tell()
+            end = b.seek(0, os.SEEK_END)
+            b.seek(position)
+            return end - position
+        return None
+    try:
+        return memoryview(b).nbytes
+    except TypeError:
+        return None
+
+class MultipartStream:
+    "A multipart/form-data request body which streams its file payload instead of building the whole body in memory."
+
+    __slots__ = "boundary", "len", "_head", "_tail", "_payload", "_chunk_size"
+
+    def __init__(self, fields:dict[str, str], b, chunk_size:int=65536):
+        if isinstance(b, io.IOBase) and not b.readable():
+            raise TypeError("Given IO object must be readable.")
+        self.boundary = uuid.uuid4().hex
+        self._chunk_size = chunk_size
+        head = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            for name, value in fields.items()
+        )
+        self._head = head + f'--{self.boundary}\r\nContent-Disposition: form-data; name="data"; filename="data"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        try:
+            #bytes-like objects (bytes, bytearray, memoryview, mmap) are sent without being copied
+            self._payload = memoryview(b).cast("B")
+        except TypeError:
+            self._payload = b
+        size = payload_size(self._payload)
+        #requests sends a Content-Length when len is known and falls back to chunked transfer encoding otherwise
+        self.len = None if size is None else len(self._head) + size + len(self._tail)
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __iter__(self):
+        yield self._head
+        if isinstance(self._payload, memoryview):
+            yield self._payload
+        elif isinstance(self._payload, io.IOBase):
+            while chunk := self._payload.read(self._chunk_size):
+                yield chunk
+        else:
+            for chunk in self._payload:
+                if chunk:
+                    yield chunk
+        yield self._tail
+
+def iter_json_array(chunks, decoder:json.JSONDecoder=json.JSONDecoder()):
+    "Incrementally parses a JSON array from an iterable of byte chunks, yielding each element as soon as it is complete."
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    for chunk in chunks:
+        buffer += text.decode(chunk)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array.")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                #the element continues in the next chunk
+                break
+            if not isinstance(value, (dict, list, str)) and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                #a number cut off by the end of the chunk may still be incomplete
+                break
+            yield value
+            position = end
+        buffer = buffer[position:]
+    raise ValueError("Unterminated JSON array.")
@@ -0,0 +1,127 @@
+from . import exceptions, metrics, responses
+import random
+import requests
+import requests.adapters
+import threading
+import time
+
+class CircuitBreaker:
+    "Stops requests from being sent to a host after repeated failures, letting a single trial request through once reset_timeout has passed."
+
+    def __init__(self, failure_threshold:int=5, reset_timeout:float=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at:float = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        "Returns whether a request may be sent."
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._trial and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+class HTTPSession(requests.Session):
+    "A requests.Session with a sized connection pool, a default timeout, retries with exponential backoff for idempotent requests and an optional circuit breaker."
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+    RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+    def __init__(self, pool_size:int=10, timeout:float=None, retries:int=0, backoff_factor:float=0.1, backoff_max:float=10.0, circuit_breaker:CircuitBreaker=None, pool_block:bool=False, instrumentation:"metrics.Instrumentation"=None, compact_responses:bool=False):
+        super().__init__()
+        self.instrumentation = instrumentation
+        self.compact_responses = compact_responses
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.circuit_breaker = circuit_breaker
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size, pool_block=pool_block)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def backoff(self, attempt:int, response:requests.Response=None):
+        "Returns how long to wait before retrying, using exponential backoff with full jitter unless the server sent Retry-After."
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(self.backoff_max, int(response.headers["Retry-After"]))
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * 2**attempt))
+
+    def request(self, method:str, url:str, **kwargs):
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        stream = kwargs.get("stream", False)
+        if self.instrumentation is None:
+            r = self._send(method, url, kwargs)
+        else:
+            self.instrumentation.before(method, url, kwargs)
+            start = time.perf_counter()
+            try:
+                r = self._send(method, url, kwargs)
+            except Exception:
+                self.instrumentation.after(method, url, None, time.perf_counter() - start)
+                raise
+            self.instrumentation.after(method, url, r, time.perf_counter() - start, stream)
+        #streamed bodies are still unread, so only complete responses can be compacted
+        if self.compact_responses and not stream:
+            r = responses.ResponseRecord.from_response(r)
+        if self.instrumentation is not None:
+            #lets the responses module count results by type
+            r.instrumentation = self.instrumentation
+        return r
+
+    def _send(self, method:str, url:str, kwargs:dict):
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow():
+            raise exceptions.CircuitOpenException(f"Not sending {method} {url}: too many recent failures.")
+        attempts = self.retries + 1 if method.upper() in self.IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            #stop retrying as soon as the circuit breaker opens
+            last = attempt == attempts - 1
+            try:
+                r = super().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                    last = last or self.circuit_breaker.open
+                if last:
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                #any other error still has to be recorded, or a failed trial request would leave the breaker open for good
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                raise
+            if r.status_code in self.RETRY_STATUSES:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                    last = last or self.circuit_breaker.open
+                if not last:
+                    r.close()
+                    time.sleep(self.backoff(attempt, r))
+                    continue
+            elif self.circuit_breaker is not None:
+                self.circuit_breaker.record_success()
+            return r
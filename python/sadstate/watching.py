@@ -0,0 +1,138 @@
+from . import exceptions, profiles, projects, sessions
+import random
+import threading
+import time
+
+#changes passed to watch callbacks
+CHANGED = "changed"
+REMOVED = "removed"
+
+class _Group:
+    "Watched objects refreshed by a single request: a Project's listing for its Profiles, or the Project itself."
+
+    __slots__ = "project", "members", "listing", "interval", "due"
+
+    def __init__(self, project:"projects.Project", listing:bool, interval:float):
+        self.project = project
+        self.listing = listing
+        self.members:"list[projects.Project|profiles.Profile]" = []
+        self.interval = interval
+        self.due = 0.0
+
+def _signature(obj:"projects.Project|profiles.Profile"):
+    return obj.name, obj.permissions
+
+class Watcher:
+    "Polls watched Projects and Profiles on a background thread, calling callback(obj, change) only when one has changed (CHANGED) or disappeared (REMOVED)."
+
+    def __init__(self, session:"sessions.Session", objects:"Iterable[projects.Project|profiles.Profile]", callback,
+                 interval:float=1.0, max_interval:float=60.0, backoff:float=2.0, jitter:float=0.1, max_workers:int=None):
+        self.session = session
+        self.callback = callback
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self._groups:dict[tuple, _Group] = {}
+        for obj in objects:
+            #every watched Profile of a Project shares one listing request
+            listing = isinstance(obj, profiles.Profile)
+            project = obj.project if listing else obj
+            group = self._groups.get((project.id, listing))
+            if group is None:
+                group = self._groups[project.id, listing] = _Group(project, listing, interval)
+            group.members.append(obj)
+        self._error:Exception = None
+        self._stop = threading.Event()
+        self._thread:threading.Thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        "Start polling on a background thread."
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sadstate-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        "Stop polling. Raises the last error raised by a callback or poll, if any."
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def poll(self, groups:"list[_Group]"=None):
+        "Refresh every watched object (or the given groups) now, concurrently over the session's connection pool."
+        groups = list(self._groups.values()) if groups is None else groups
+        self.session.map(self._poll, groups, self.max_workers)
+
+    def _poll(self, group:_Group):
+        try:
+            changes = self._refresh(group)
+            for obj, change in changes:
+                self.callback(obj, change)
+        except Exception as e:
+            #surfaced by stop(), so one failing poll or callback does not end the watch
+            self._error = e
+            changes = None
+        if changes:
+            group.interval = self.interval
+        else:
+            #idle (or failing) groups are polled less and less often
+            group.interval = min(self.max_interval, group.interval * self.backoff)
+        group.due = time.monotonic() + group.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _refresh(self, group:_Group):
+        with self.session._cached.lock:
+            before = {id(obj):_signature(obj) for obj in group.members}
+        if not group.listing:
+            try:
+                resp = group.project.update()
+            except exceptions.OutOfDateException:
+                return self._removed(group, group.project)
+            if not resp:
+                return self._removed(group, group.project) if resp.code == 404 else []
+            return [(group.project, CHANGED)] if _signature(group.project) != before[id(group.project)] else []
+        resp = group.project.get_all_profiles()
+        if not resp:
+            #the Project is gone, and its Profiles with it
+            return [change for prof in list(group.members) for change in self._removed(group, prof)] if resp.code == 404 else []
+        listed = {prof.id:prof for prof in resp.profiles}
+        changes = []
+        for prof in list(group.members):
+            current = listed.get(prof.id)
+            if current is None:
+                changes += self._removed(group, prof)
+                continue
+            if current is not prof:
+                #the watched object is no longer the cached one, so it is updated from the listing
+                with self.session._cached.lock:
+                    prof.name, prof.permissions = current.name, current.permissions
+            if _signature(prof) != before[id(prof)]:
+                changes.append((prof, CHANGED))
+        return changes
+
+    def _removed(self, group:_Group, obj):
+        group.members.remove(obj)
+        return [(obj, REMOVED)]
+
+    def _run(self):
+        while not self._stop.is_set():
+            groups = [group for group in self._groups.values() if group.members]
+            if not groups:
+                return
+            now = time.monotonic()
+            due = [group for group in groups if group.due <= now]
+            if due:
+                #everything due is polled in one concurrent batch
+                self.poll(due)
+                continue
+            self._stop.wait(min(group.due for group in groups) - now)
@@ -0,0 +1,37 @@
+from benchmarks import mock_server
+from sadstate import sessions
+import pytest
+
+PASSWORD = "password"
+
+@pytest.fixture
+def server():
+    server, _ = mock_server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def host(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+@pytest.fixture
+def connect(host):
+    "Returns a function creating Sessions against the mock server, each authenticated as a new Auth unless given an Auth ID."
+    def connect(auth_id:int=None, target:str=None, **options):
+        session = sessions.Session(target or host, **options)
+        if auth_id is None:
+            session.new_auth(PASSWORD)
+        else:
+            session.authenticate(auth_id, PASSWORD)
+        return session
+    return connect
+
+@pytest.fixture
+def session(connect):
+    return connect()
+
+@pytest.fixture
+def project(session):
+    session.register_project("project")
+    return session.get_project("project").project
@@ -0,0 +1,54 @@
+from sadstate import aio, responses
+import asyncio
+import pytest
+
+def run(host:str, test):
+    async def main():
+        async with aio.AsyncSession(host) as session:
+            await session.new_auth("password")
+            await session.register_project("project")
+            await test(session, (await session.get_project("project")).project)
+    asyncio.run(main())
+
+def test_profile_round_trip(host):
+    async def test(session, project):
+        assert await project.add_profile("profile")
+        prof = (await project.get_profile("profile")).profile
+        assert await prof.write(b"hello")
+        assert await prof.append(b" world")
+        reads = await asyncio.gather(*[prof.read() for _ in range(10)])
+        assert all(resp.content == b"hello world" for resp in reads)
+        assert [prof.name for prof in (await project.get_all_profiles()).profiles] == ["profile"]
+        assert isinstance(await session.get_project("missing"), responses.NotFoundResponse)
+    run(host, test)
+
+def test_batch(host):
+    async def test(session, project):
+        await project.add_profile("a")
+        written = await project.write_profiles({"a":b"1", "missing":b"2"})
+        assert written["a"] and not written["missing"]
+        read = await project.read_profiles(["a", "missing"])
+        assert read["a"].content == b"1"
+        assert isinstance(read["missing"], responses.NotFoundResponse)
+    run(host, test)
+
+def test_sync_only_methods_do_not_exist(host):
+    async def test(session, project):
+        await project.add_profile("profile")
+        prof = (await project.get_profile("profile")).profile
+        for obj, name in ((project, "iter_profiles"), (project, "write_profiles"), (prof, "appender"), (prof, "_write")):
+            assert hasattr(obj, name) == (name == "write_profiles")
+        with pytest.raises(AttributeError):
+            project.iter_profiles()
+    run(host, test)
+
+def test_listings_reuse_cached_profiles(host):
+    async def test(session, project):
+        for name in ("a", "b"):
+            await project.add_profile(name)
+        a = (await project.get_profile("a")).profile
+        listed = (await project.get_all_profiles()).profiles
+        assert listed[0] is a
+        assert (await project.get_all_profiles()).profiles[1] is listed[1]
+        assert (await session.get_project("project")).project is project
+    run(host, test)
@@ -0,0 +1,59 @@
+from sadstate import exceptions, responses
+import pytest
+import time
+
+@pytest.fixture
+def prof(project):
+    project.add_profile("profile")
+    return project.get_profile("profile").profile
+
+def stored(server):
+    return server.state.projects["project"]["profiles"]["profile"]["content"]
+
+def test_flushes_after_max_delay(server, prof):
+    with prof.appender(max_delay=0.05) as appender:
+        appender.append(b"a")
+        appender.append(b"b")
+        assert stored(server) == b""
+        time.sleep(0.3)
+        assert stored(server) == b"ab"
+        assert appender.buffered == 0
+
+def test_full_buffer_is_sent_by_the_caller(server, prof):
+    with prof.appender(max_bytes=4, max_delay=60) as appender:
+        appender.append(b"12")
+        assert stored(server) == b""
+        appender.append(b"34")
+        #the caller sent it, without waiting for the background thread
+        assert stored(server) == b"1234"
+        appender.append(b"5")
+    assert stored(server) == b"12345"
+
+def test_failed_flush_keeps_data(server, prof):
+    appender = prof.appender(max_delay=60)
+    appender.append(b"unsent")
+    del server.state.projects["project"]["profiles"]["profile"]
+    with pytest.raises(exceptions.FlushException) as info:
+        appender.flush()
+    assert info.value.data == b"unsent"
+    assert isinstance(info.value.response, responses.NotFoundResponse)
+    appender.close()
+
+def test_background_failure_is_raised_by_next_append(server, prof):
+    appender = prof.appender(max_delay=0.05)
+    del server.state.projects["project"]["profiles"]["profile"]
+    appender.append(b"unsent")
+    time.sleep(0.3)
+    with pytest.raises(exceptions.FlushException):
+        appender.append(b"more")
+    appender.close()
+
+def test_rejects_appends_which_cannot_fit(server, prof):
+    server.state.capacity = 8
+    prof.write(b"1234")
+    with prof.appender(max_delay=60) as appender:
+        appender.append(b"1234")
+        with pytest.raises(exceptions.InsufficientSpaceException):
+            appender.append(b"5")
+    with pytest.raises(ValueError):
+        appender.append(b"closed")
@@ -0,0 +1,13 @@
+from benchmarks import bench
+from sadstate import responses
+
+def test_bench_runs_against_mock_server(host):
+    results = bench.run(host, [2], [16], 2)
+    assert [row["benchmark"] for row in results] == ["get_project", "get_all_profiles", "write", "read", "append"]
+    assert all(row["ops_per_s"] > 0 for row in results)
+
+def test_mock_server_injects_errors(server, session):
+    server.state.error_rate = 1.0
+    resp = session.get_project("project")
+    assert isinstance(resp, responses.UnexpectedErrorResponse)
+    assert resp.code == 503
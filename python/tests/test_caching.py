@@ -0,0 +1,144 @@
+from benchmarks import mock_server
+from sadstate import caching
+import os
+import time
+
+def test_ttl_answers_lookups_locally(server, connect):
+    session = connect(cache_ttl=0.2)
+    session.register_project("project")
+    project = session.get_project("project").project
+    project.add_profile("profile")
+    prof = project.get_profile("profile").profile
+    server.state.projects.clear()
+    assert session.get_project("project").project is project
+    assert project.get_profile("profile").profile is prof
+    assert session.cache.stats()["hits"] == 2
+    time.sleep(0.3)
+    assert not session.get_project("project")
+
+def test_cached_objects_are_reused(session, project):
+    project.add_profile("profile")
+    assert session.get_project("project").project is project
+    prof = project.get_profile("profile").profile
+    assert project.get_all_profiles().profile is prof
+
+def test_evicted_project_stays_reachable_from_its_profiles(connect):
+    session = connect(cache_size=3)
+    session.register_project("project")
+    project = session.get_project("project").project
+    for i in range(5):
+        project.add_profile(f"profile{i}")
+    profs = project.get_all_profiles().profiles
+    del project
+    assert len(session.cache) <= 3
+    assert all(prof.project is not None for prof in profs)
+    assert profs[0].write(b"contents")
+    assert profs[0].read().content == b"contents"
+
+def _content_session(connect, target:str=None, **options):
+    session = connect(target=target, content_cache=caching.ContentCache(**options))
+    session.register_project("project")
+    project = session.get_project("project").project
+    project.add_profile("profile")
+    return session, project.get_profile("profile").profile
+
+def test_content_cache_serves_reads(server, connect):
+    session, prof = _content_session(connect)
+    prof.write(b"contents")
+    server.state.projects["project"]["profiles"]["profile"]["content"] = b"changed"
+    assert prof.read().content == b"contents"
+    assert prof.read(offset=3, length=2).content == b"te"
+    assert session.content_cache.stats()["hits"] == 2
+
+def test_disk_cache_returns_bytes(connect, tmp_path):
+    _, prof = _content_session(connect, max_memory=0, directory=tmp_path)
+    prof.write(b"contents")
+    content = prof.read().content
+    assert type(content) is bytes and content == b"contents"
+    #entries on disk are found again by a new cache
+    assert caching.ContentCache(directory=tmp_path).get(prof._content_key) == b"contents"
+
+def test_disk_cache_is_namespaced_by_host(connect, tmp_path):
+    other, other_host = mock_server.start()
+    try:
+        contents = {}
+        for target, content in ((None, b"first"), (other_host, b"second")):
+            _, prof = _content_session(connect, target, max_memory=0, directory=tmp_path)
+            prof.write(content)
+            contents[target] = prof.read().content
+        assert contents == {None:b"first", other_host:b"second"}
+    finally:
+        other.shutdown()
+        other.server_close()
+
+def test_content_cache_ttl_and_update(connect, project):
+    session = connect(project.session.auth_id, content_cache=caching.ContentCache(ttl=0.05))
+    project.add_profile("profile")
+    writer = project.get_profile("profile").profile
+    prof = session.get_project("project").project.get_profile("profile").profile
+    writer.write(b"v1")
+    assert prof.read().content == b"v1"
+    writer.write(b"v2")
+    assert prof.read().content == b"v1"
+    prof.update()
+    assert prof.read().content == b"v2"
+    writer.write(b"v3")
+    time.sleep(0.1)
+    assert prof.read().content == b"v3"
+
+def test_content_cache_is_size_bounded(tmp_path):
+    cache = caching.ContentCache(max_memory=8, directory=tmp_path, max_disk=8)
+    cache.put(("host", 1, 1), b"12345")
+    cache.put(("host", 1, 2), b"12345")
+    assert cache.get(("host", 1, 1)) is None
+    assert cache.get(("host", 1, 2)) == b"12345"
+    assert cache.stats()["memory_bytes"] == cache.stats()["disk_bytes"] == 5
+
+def test_name_index_follows_renames(session, project):
+    project.add_profile("profile")
+    prof = project.get_profile("profile").profile
+    cache = session.cache
+    assert cache.find("project") == project.id
+    assert cache.find("profile", project) == prof.id
+    assert project.edit(name="renamed")
+    assert prof.edit(name="renamed profile")
+    assert cache.find("project") is None and cache.find("renamed") == project.id
+    assert cache.find("profile", project) is None and cache.find("renamed profile", project) == prof.id
+    assert session.get_project("renamed").project is project
+
+def test_name_index_drops_removed_objects(session, project):
+    for name in ("a", "b"):
+        project.add_profile(name)
+    a, b = project.get_all_profiles().profiles
+    assert project.remove_profile("a")
+    assert session.cache.find("a", project) is None and a.id not in session.cache
+    assert project.delete()
+    assert session.cache.find("project") is None and session.cache.find("b", project) is None
+    assert len(session.cache) == 0
+
+def test_append_extends_entries_in_place(tmp_path):
+    cache = caching.ContentCache(max_memory=8, directory=tmp_path, max_disk=16)
+    key = ("host", 1, 1)
+    cache.append(key, b"uncached")
+    assert cache.get(key) is None
+    cache.put(key, b"abc")
+    path = cache._path(cache._digest(key))
+    inode = os.stat(path).st_ino
+    for chunk in (b"de", b"fg", b"hij"):
+        cache.append(key, chunk)
+    assert cache.stats() == {"memory_bytes":0, "disk_bytes":10, "hits":0, "misses":1}
+    #the file is appended to rather than rewritten
+    assert os.stat(path).st_ino == inode
+    assert cache.get(key) == b"abcdefghij"
+    cache.append(key, b"klmnopq")
+    assert cache.get(key) is None and not os.path.exists(path)
+
+def test_append_drops_expired_entries():
+    cache = caching.ContentCache(ttl=0.05)
+    key = ("host", 1, 1)
+    cache.put(key, b"abc")
+    cache.append(key, b"d")
+    assert cache.get(key) == b"abcd"
+    time.sleep(0.1)
+    cache.append(key, b"e")
+    assert cache.stats()["memory_bytes"] == 0
@@ -0,0 +1,43 @@
+from sadstate import compression
+import io
+import lzma
+import pytest
+
+@pytest.mark.parametrize("name, level", [("zlib", -1), ("zlib", 0), ("zlib", 9), ("lzma", 0), ("lzma", 9 | lzma.PRESET_EXTREME)])
+def test_every_level_round_trips(name, level):
+    codec = compression.Codec(name, level)
+    data = b"state" * 1000
+    frame = codec.compress(data)
+    assert frame.startswith(compression.MAGIC)
+    assert compression.decompress(frame) == data
+    assert compression.decompress(frame + codec.compress(b"more")) == data + b"more"
+
+@pytest.mark.parametrize("name, level", [("zlib", 10), ("zlib", -2), ("lzma", 10)])
+def test_invalid_level(name, level):
+    with pytest.raises(ValueError):
+        compression.Codec(name, level)
+
+def test_raw_contents_pass_through():
+    frame = compression.Codec().compress(b"compressed")
+    assert compression.decompress(b"plain") == b"plain"
+    assert compression.decompress(b"plain" + frame) == b"plain" + frame
+    #an incomplete header at the end is kept until flushed
+    assert compression.decompress(b"SD") == b"SD"
+
+def test_compressed_profile(connect, project):
+    session = connect(project.session.auth_id, compression=compression.Codec("lzma", 9 | lzma.PRESET_EXTREME))
+    project.add_profile("profile")
+    prof = session.get_project("project").project.get_profile("profile").profile
+    assert prof.write(b"state" * 1000)
+    assert prof.append(b"appended")
+    assert prof.read().content == b"state" * 1000 + b"appended"
+
+def test_streamed_payloads_are_compressed(connect, project):
+    session = connect(project.session.auth_id, compression=compression.Codec())
+    project.add_profile("profile")
+    prof = session.get_project("project").project.get_profile("profile").profile
+    assert prof.write(chunk for chunk in [b"gen", b"erator"])
+    assert prof.append(io.BytesIO(b"+file"))
+    assert prof.read().content == b"generator+file"
+    #clients without compression see the stored frames
+    assert project.get_profile("profile").profile.read().content.startswith(compression.MAGIC)
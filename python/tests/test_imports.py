@@ -0,0 +1,24 @@
+import json
+import pytest
+import subprocess
+import sys
+
+def imported(code:str):
+    "Runs code in a fresh interpreter, returning the modules it imported."
+    process = subprocess.run([sys.executable, "-c", f"import json, sys; {code}; print(json.dumps(list(sys.modules)))"], capture_output=True, text=True, check=True)
+    return set(json.loads(process.stdout))
+
+@pytest.mark.parametrize("code", ["import sadstate", "import sadstate.responses", "from sadstate import permissions; permissions.ProjectPermissions.all()"])
+def test_import_does_not_load_requests(code):
+    assert "requests" not in imported(code)
+
+def test_submodules_load_on_first_access():
+    assert {"sadstate.sessions", "sadstate.projects"}.isdisjoint(imported("import sadstate"))
+    assert {"sadstate.sessions", "requests"} <= imported("import sadstate; sadstate.sessions")
+    assert "sadstate.util" in imported("import sadstate; sadstate.resolve")
+
+def test_unknown_attributes():
+    import sadstate
+    assert "sessions" in dir(sadstate)
+    with pytest.raises(AttributeError):
+        sadstate.missing
@@ -0,0 +1,31 @@
+from sadstate import metrics
+import pytest
+
+@pytest.fixture
+def instrumentation():
+    return metrics.Instrumentation()
+
+def test_hooks_and_endpoint_metrics(connect, instrumentation):
+    calls = []
+    instrumentation.add_pre_hook(lambda method, url, kwargs: calls.append(("pre", method, instrumentation.endpoint(url))))
+    instrumentation.add_post_hook(lambda method, url, response, elapsed: calls.append(("post", response.status_code)))
+    session = connect(instrumentation=instrumentation)
+    calls.clear()
+    session.get_project("missing")
+    assert calls == [("pre", "GET", "/project/get"), ("post", 404)]
+    endpoint = instrumentation.snapshot()["endpoints"]["/project/get"]
+    assert endpoint["latency"]["count"] == 1
+    assert endpoint["bytes_in"] == len("Project not found")
+    assert endpoint["results"] == {"NotFoundResponse":1}
+    assert 'sadstate_responses_total{endpoint="/project/get",type="NotFoundResponse"} 1' in instrumentation.prometheus()
+
+def test_cache_hits_are_not_counted_as_results(connect, instrumentation):
+    session = connect(cache_ttl=60, instrumentation=instrumentation)
+    session.register_project("project")
+    for _ in range(5):
+        assert session.get_project("project")
+    snapshot = instrumentation.snapshot()
+    endpoint = snapshot["endpoints"]["/project/get"]
+    assert endpoint["latency"]["count"] == 1
+    assert endpoint["results"] == {"ProjectResponse":1}
+    assert snapshot["caches"]["metadata"]["hits"] == 4
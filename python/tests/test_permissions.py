@@ -0,0 +1,51 @@
+from sadstate import permissions, responses
+import pytest
+
+@pytest.fixture
+def preflight_session(connect):
+    return connect(preflight=True)
+
+@pytest.fixture
+def preflight_project(preflight_session):
+    session = preflight_session
+    session.register_project("project")
+    project = session.get_project("project").project
+    for name in ("a", "b", "c"):
+        project.add_profile(name)
+    return project
+
+def test_preflight_allows_owner_without_entry(preflight_project):
+    assert preflight_project.get_profile("a").profile.write(b"contents")
+    assert preflight_project.remove_profile("a")
+
+def test_preflight_remove_profile_permission(preflight_project):
+    me = preflight_project.session.auth_id
+    preflight_project.edit(permissions={me:permissions.ProjectPermissions.REMOVE_PROFILE | permissions.ProjectPermissions.VIEW})
+    assert preflight_project.remove_profile("b")
+    preflight_project.edit(permissions={me:permissions.ProjectPermissions.VIEW})
+    resp = preflight_project.remove_profile("c")
+    assert not resp
+    assert resp.value == permissions.ProjectPermissions.REMOVE_PROFILE
+    assert resp.reason.endswith("(checked locally).")
+
+def test_can_and_filter_readable(session, project):
+    me = session.auth_id
+    project.add_profile("open")
+    project.add_profile("denied", permissions={me:permissions.ProfilePermissions.WRITE})
+    project.add_profile("granted", permissions={me:permissions.ProfilePermissions.READ})
+    profs = {prof.name:prof for prof in project.get_all_profiles().profiles}
+    assert session.can(profs["open"], permissions.ProfilePermissions.READ)
+    assert not session.can(profs["denied"], permissions.ProfilePermissions.READ)
+    assert [prof.name for prof in session.filter_readable(profs.values())] == ["open", "granted"]
+    #ProjectPermissions asked of a Profile are checked against its Project
+    project.edit(permissions={me:permissions.ProjectPermissions.VIEW})
+    assert not session.can(profs["open"], permissions.ProjectPermissions.EDIT)
+
+def test_preflight_denies_without_request(preflight_session, preflight_project):
+    me = preflight_session.auth_id
+    prof = preflight_project.get_profile("a").profile
+    assert prof.edit(permissions={me:permissions.ProfilePermissions.WRITE})
+    resp = prof.read()
+    assert isinstance(resp, responses.InvalidPermissionResponse) and resp.code == 403
+    assert resp.value == permissions.ProfilePermissions.READ
+    assert resp.response.url is None
@@ -0,0 +1,53 @@
+from sadstate import caching, responses
+import io
+import pytest
+
+@pytest.fixture
+def prof(project):
+    project.add_profile("profile")
+    prof = project.get_profile("profile").profile
+    prof.write(b"contents")
+    return prof
+
+def test_ranged_read(prof):
+    assert prof.read(offset=3).content == b"tents"
+    assert prof.read(offset=2, length=3).content == b"nte"
+    assert prof.read(length=100).content == b"contents"
+    assert isinstance(prof.read(offset=50), responses.InvalidInputResponse)
+    with pytest.raises(ValueError):
+        prof.read(length=0)
+
+def test_streamed_read(prof):
+    resp = prof.read(stream=True)
+    assert b"".join(resp.iter_content(3)) == b"contents"
+
+def test_read_into_file(prof):
+    f = io.BytesIO()
+    assert prof.read(into=f).num_bytes == 8
+    assert f.getvalue() == b"contents"
+
+def test_read_into_buffer(prof):
+    buffer = bytearray(3)
+    assert prof.read(into=buffer).num_bytes == 3
+    assert buffer == b"con"
+
+def test_read_into_empty_buffer(prof):
+    resp = prof.read(into=bytearray(0))
+    assert resp
+    assert resp.num_bytes == 0
+
+@pytest.mark.parametrize("content_cache", [None, caching.ContentCache()])
+def test_ranged_read_past_the_end(connect, content_cache):
+    session = connect(content_cache=content_cache)
+    session.register_project("project")
+    project = session.get_project("project").project
+    project.add_profile("profile")
+    prof = project.get_profile("profile").profile
+    assert isinstance(prof.read(length=1), responses.InvalidInputResponse)
+    prof.write(b"contents")
+    prof.read()
+    resp = prof.read(offset=50)
+    assert isinstance(resp, responses.InvalidInputResponse) and resp.code == 416
+    assert prof.read(offset=7).content == b"s"
+    with pytest.raises(ValueError):
+        prof.read(offset=-1)
@@ -0,0 +1,46 @@
+from sadstate import caching, responses
+
+def test_write_and_read_profiles(project):
+    for name in ("a", "b", "c"):
+        project.add_profile(name)
+    written = project.write_profiles({"a":b"1", "b":b"2", "missing":b"3"})
+    assert list(written) == ["a", "b", "missing"]
+    assert isinstance(written["a"], responses.RemainingSpaceResponse)
+    assert isinstance(written["missing"], responses.NotFoundResponse)
+    read = project.read_profiles(["a", "b", "c", "missing"])
+    assert {name:resp.content for name, resp in read.items() if resp} == {"a":b"1", "b":b"2", "c":b""}
+    assert isinstance(read["missing"], responses.NotFoundResponse)
+
+def test_batch_uses_cached_profiles(project):
+    project.add_profile("a")
+    prof = project.get_profile("a").profile
+    assert project.write_profiles({"a":b"contents"})["a"]
+    #writes through the cached Profile keep its space tracking up to date
+    assert prof._remaining_space is not None
+    assert project.read_profiles(["a"])["a"].content == b"contents"
+
+def test_iter_profiles_reuses_cached_profiles(project):
+    for i in range(5):
+        project.add_profile(f"profile{i}")
+    cached = project.get_profile("profile3").profile
+    listed = list(project.iter_profiles(chunk_size=7))
+    assert [prof.name for prof in listed] == [f"profile{i}" for i in range(5)]
+    assert listed[3] is cached
+    assert all(a is b for a, b in zip(project.get_all_profiles().profiles, listed))
+
+def test_batch_keeps_content_cache_up_to_date(connect):
+    session = connect(cache_size=2, content_cache=caching.ContentCache())
+    session.register_project("project")
+    project = session.get_project("project").project
+    for name in ("a", "b", "c"):
+        project.add_profile(name)
+    a = project.get_profile("a").profile
+    a.write(b"v1")
+    assert a.read().content == b"v1"
+    #a is evicted from the metadata cache, but its contents stay cached
+    project.get_profile("b")
+    project.get_profile("c")
+    assert project._cached_profile("a") is None
+    assert project.write_profiles({"a":b"v2"})["a"]
+    assert a.read().content == b"v2"
+    assert project.read_profiles(["a"])["a"].content == b"v2"
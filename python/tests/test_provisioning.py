@@ -0,0 +1,45 @@
+from sadstate import metrics, permissions
+
+def test_apply_issues_only_needed_calls(connect):
+    instrumentation = metrics.Instrumentation()
+    session = connect(instrumentation=instrumentation)
+    spec = {"project":{"profiles":{f"profile{i}":{"content":b"contents"} for i in range(10)}}}
+    result = session.apply(spec)
+    assert result
+    counts = {endpoint:stats["latency"]["count"] for endpoint, stats in instrumentation.snapshot()["endpoints"].items()}
+    #one lookup while planning, and one for the new Project and its new Profiles each
+    assert counts["/project/get"] == 2
+    assert counts["/project/profile/all"] == 1
+    assert counts["/project/profile/add"] == 10
+    assert counts["/project/profile/write"] == 10
+    assert session.plan(spec) == []
+
+def test_plan_only_changes_what_differs(session, project):
+    me = session.auth_id
+    project.add_profile("same")
+    project.get_profile("same").profile.write(b"same")
+    spec = {"project":{
+        "permissions":{me:permissions.ProjectPermissions.all()},
+        "profiles":{"same":{"content":b"same"}, "new":{"content":b"new"}},
+    }}
+    result = session.apply(spec, dry_run=True)
+    assert result.dry_run
+    assert [str(action) for action in result.actions] == [
+        f"edit_project project ({me}={permissions.ProjectPermissions.all().name})",
+        "add_profile project/new",
+        "write_profile project/new (3 bytes)",
+    ]
+    assert project.get_profile("new").code == 404
+    assert session.apply(spec)
+    assert session.plan(spec) == []
+
+def test_failure_rolls_back_created_resources(server, session, project):
+    server.state.capacity = 4
+    result = session.apply({
+        "project":{"profiles":{"added":{"content":b"too long"}}},
+        "created":{"profiles":{"fits":{"content":b"ok"}}},
+    })
+    assert not result and result.rolled_back
+    assert [action.kind for action in result.failed] == ["write_profile"]
+    assert "created" not in server.state.projects
+    assert server.state.projects["project"]["profiles"] == {}
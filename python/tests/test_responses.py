@@ -0,0 +1,32 @@
+from sadstate import responses
+
+def test_compact_responses(connect):
+    session = connect(compact_responses=True)
+    session.register_project("project")
+    resp = session.get_project("project")
+    assert isinstance(resp.response, responses.ResponseRecord)
+    assert resp.response.url.endswith("/project/get?name=project")
+    assert resp.project.name == "project"
+    missing = session.get_project("missing")
+    assert isinstance(missing.response, responses.ResponseRecord)
+    assert missing.reason == "Project not found"
+    assert missing.reason is missing.reason
+
+def test_streamed_responses_are_not_compacted(connect):
+    session = connect(compact_responses=True)
+    session.register_project("project")
+    project = session.get_project("project").project
+    project.add_profile("profile")
+    prof = project.get_profile("profile").profile
+    prof.write(b"contents")
+    resp = prof.read(stream=True)
+    assert not isinstance(resp.response, responses.ResponseRecord)
+    assert b"".join(resp.iter_content(3)) == b"contents"
+
+def test_response_record():
+    record = responses.ResponseRecord(404, b'{"a": "\xc3\xa9"}', headers={"ETag":"1"})
+    assert not record.ok
+    assert record.text == '{"a": "é"}'
+    assert record.json() == {"a":"é"}
+    assert b"".join(record.iter_content(4)) == record.content
+    assert not responses.NotFoundResponse(record)
@@ -0,0 +1,12 @@
+def test_map_keeps_order(session):
+    assert session.map(lambda i: i * 2, range(20), 4) == [i * 2 for i in range(20)]
+
+def test_concurrent_lookups_share_one_object(session, project):
+    for i in range(5):
+        project.add_profile(f"profile{i}")
+    session.clear_cache()
+    found = session.map(lambda _: session.get_project("project").project, range(20))
+    assert all(each is found[0] for each in found)
+    listings = session.map(lambda _: found[0].get_all_profiles().profiles, range(20))
+    assert all(a is b for listing in listings for a, b in zip(listing, listings[0]))
+    assert len(session.cache) == 6
@@ -0,0 +1,45 @@
+from sadstate import sharding
+import collections
+import pytest
+import requests
+
+#nothing listens on the discard port
+DEAD = "http://127.0.0.1:9"
+
+def test_failover_keeps_project_bound_to_its_host(host):
+    session = sharding.ShardedSession([host, DEAD], replicas=1, timeout=1)
+    session.sessions[host].new_auth("password")
+    name = next(f"project{i}" for i in range(100) if session.session_for(f"project{i}").host == DEAD)
+    session.sessions[host].register_project(name)
+    resp = session.get_project(name)
+    assert resp
+    assert resp.project.session is session.sessions[DEAD]
+    with pytest.raises(requests.ConnectionError):
+        resp.project.add_profile("profile")
+
+def test_client_errors_do_not_fail_over(host):
+    from benchmarks import mock_server
+    other, other_host = mock_server.start()
+    try:
+        session = sharding.ShardedSession([host, other_host], replicas=1)
+        replica = session.sessions[session.ring.hosts_for("project", 2)[1]]
+        replica.new_auth("password")
+        replica.register_project("project")
+        assert not session.get_project("project")
+    finally:
+        other.shutdown()
+        other.server_close()
+
+def test_ring_moves_only_the_new_hosts_share():
+    ring = sharding.HashRing(["a", "b", "c"])
+    keys = [f"project{i}" for i in range(1000)]
+    before = {key:ring.hosts_for(key)[0] for key in keys}
+    counts = collections.Counter(before.values())
+    assert all(150 < counts[host] < 550 for host in "abc")
+    ring.add("d")
+    after = {key:ring.hosts_for(key)[0] for key in keys}
+    moved = [key for key in keys if before[key] != after[key]]
+    assert moved and all(after[key] == "d" for key in moved)
+    assert len(set(ring.hosts_for("project0", 3))) == 3
+    ring.remove("d")
+    assert {key:ring.hosts_for(key)[0] for key in keys} == before
@@ -0,0 +1,59 @@
+from sadstate import projects, sessions
+import os
+import pytest
+import stat
+
+def test_state_round_trip(connect, host, tmp_path):
+    session = connect(cache_ttl=60)
+    session.register_project("project")
+    project = session.get_project("project").project
+    project.add_profile("profile")
+    project.get_all_profiles()
+    #ids wider than 64 bits
+    wide = projects.Project(2**80 + 5, "wide", {}, session)
+    session._cached.store(wide.id, wide)
+    path = tmp_path / "state.bin"
+    session.save_state(path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    restored = sessions.Session(host, cache_ttl=60)
+    assert restored.load_state(path, max_age=30)
+    assert restored.auth_id == session.auth_id
+    assert wide.id in restored.cache
+    resp = restored.get_project("project")
+    assert resp.project.get_profile("profile").profile.project is resp.project
+    assert not sessions.Session("http://other").load_state(path)
+
+def test_stale_or_invalid_state_is_not_loaded(session, host, tmp_path):
+    path = tmp_path / "state.bin"
+    session._s.cookies.set("sid", "cookie", domain="127.0.0.1", path="/")
+    session.save_state(path)
+    restored = sessions.Session(host)
+    assert not restored.load_state(path, max_age=0)
+    assert restored.auth_id is None
+    assert restored.load_state(path)
+    assert restored._s.cookies.get("sid") == "cookie"
+    (tmp_path / "other.bin").write_bytes(b"not a state file" * 4)
+    with pytest.raises(ValueError):
+        restored.load_state(tmp_path / "other.bin")
+
+def test_profiles_of_evicted_projects_are_restored(connect, host, tmp_path):
+    session = connect(cache_size=2)
+    session.register_project("project")
+    project = session.get_project("project").project
+    project.add_profile("a")
+    project.add_profile("b")
+    project.get_all_profiles()
+    assert project.id not in session.cache
+    path = tmp_path / "state.bin"
+    session.save_state(path)
+
+    restored = sessions.Session(host)
+    assert restored.load_state(path)
+    assert len(restored.cache) == 2
+    #the Project is restored for its Profiles without a cache entry of its own
+    assert project.id not in restored.cache
+    profs = restored.cache.values()
+    assert {prof.name for prof in profs} == {"a", "b"}
+    assert profs[0].project is profs[1].project and profs[0].project.name == "project"
+    assert profs[0].write(b"contents")
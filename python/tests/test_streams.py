@@ -0,0 +1,57 @@
+from sadstate import exceptions, streams
+import io
+import json
+import mmap
+import pytest
+
+def test_multipart_length():
+    assert streams.MultipartStream({"name":"project"}, b"data").len is not None
+    assert streams.MultipartStream({"name":"project"}, (chunk for chunk in [b"da", b"ta"])).len is None
+    f = io.BytesIO(b"skipped data")
+    f.seek(8)
+    body = streams.MultipartStream({"name":"project"}, f)
+    assert body.len == len(b"".join(streams.MultipartStream({"name":"project"}, b"data")))
+    assert b"".join(body).count(b"\r\n\r\ndata\r\n") == 1
+
+def test_multipart_rejects_unreadable_files(tmp_path):
+    with open(tmp_path / "data", "wb") as f, pytest.raises(TypeError):
+        streams.MultipartStream({}, f)
+
+@pytest.fixture
+def prof(project):
+    project.add_profile("profile")
+    return project.get_profile("profile").profile
+
+def test_write_payload_types(prof, tmp_path):
+    assert prof.write(chunk for chunk in [b"gen", b"erator"])
+    assert prof.read().content == b"generator"
+    assert prof.write(io.BytesIO(b"file"))
+    assert prof.read().content == b"file"
+    path = tmp_path / "data"
+    path.write_bytes(b"mapped")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        assert prof.write(mapped)
+    assert prof.append(memoryview(b"+view"))
+    assert prof.read().content == b"mapped+view"
+
+def test_check_space(server, prof):
+    server.state.capacity = 16
+    assert prof.write(b"12345678")
+    with pytest.raises(exceptions.InsufficientSpaceException):
+        prof.append(b"x" * 9, check_space=True)
+    with pytest.raises(exceptions.InsufficientSpaceException):
+        prof.write(b"x" * 17, check_space=True)
+    assert prof.append(b"x" * 8, check_space=True)
+    assert prof.read().content == b"12345678" + b"x" * 8
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_iter_json_array_across_chunks(size):
+    values = [{"name":"é ] ,\"x"}, 4.5, -12, [1, [2]], "s", True, None, 10]
+    data = json.dumps(values).encode("utf-8")
+    chunks = [data[i:i + size] for i in range(0, len(data), size)]
+    assert list(streams.iter_json_array(chunks)) == values
+
+@pytest.mark.parametrize("data", [b'{"a": 1}', b'[1, 2', b''])
+def test_iter_json_array_rejects_invalid(data):
+    with pytest.raises(ValueError):
+        list(streams.iter_json_array([data]))
@@ -0,0 +1,47 @@
+from sadstate import exceptions, transport
+from unittest import mock
+import pytest
+import requests
+import time
+
+@pytest.fixture
+def sent():
+    "Records the method of every request sent over the wire, retries included."
+    methods = []
+    request = requests.Session.request
+    def counting(self, method, url, **kwargs):
+        methods.append(method)
+        return request(self, method, url, **kwargs)
+    with mock.patch.object(requests.Session, "request", counting):
+        yield methods
+
+def test_retries_idempotent_requests_only(server, connect, sent):
+    session = connect(retries=2, backoff_factor=0)
+    server.state.error_rate = 1.0
+    sent.clear()
+    assert session.get_project("project").code == 503
+    assert session.register_project("project").code == 503
+    assert sent == ["GET"] * 3 + ["POST"]
+
+def test_breaker_opens_after_failures(server, connect):
+    breaker = transport.CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    session = connect(circuit_breaker=breaker)
+    server.state.error_rate = 1.0
+    session.get_project("project")
+    session.get_project("project")
+    assert breaker.open
+    with pytest.raises(exceptions.CircuitOpenException):
+        session.get_project("project")
+
+def test_breaker_half_open_after_interrupted_trial(connect):
+    breaker = transport.CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    session = connect(circuit_breaker=breaker)
+    breaker.record_failure()
+    time.sleep(0.1)
+    #the trial request fails with an exception that is not a ConnectionError
+    with mock.patch.object(requests.Session, "request", side_effect=requests.exceptions.ChunkedEncodingError()):
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            session.get_project("project")
+    time.sleep(0.1)
+    assert session.register_project("project")
+    assert not breaker.open
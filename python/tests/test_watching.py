@@ -0,0 +1,35 @@
+from sadstate import permissions, watching
+import threading
+
+def test_project_deletion_removes_watched_profiles(session, project):
+    project.add_profile("a")
+    project.add_profile("b")
+    changes = []
+    watcher = watching.Watcher(session, project.get_all_profiles().profiles, lambda obj, change: changes.append((obj.name, change)))
+    watcher.poll()
+    assert changes == []
+    project.delete()
+    watcher.poll()
+    assert sorted(changes) == [("a", watching.REMOVED), ("b", watching.REMOVED)]
+    watcher.stop()
+
+def test_changes_made_elsewhere_are_reported(connect, session, project):
+    project.add_profile("profile")
+    prof = project.get_profile("profile").profile
+    changes = []
+    watcher = watching.Watcher(session, [project, prof], lambda obj, change: changes.append((obj.name, change)))
+    watcher.poll()
+    other_session = connect(session.auth_id)
+    other = other_session.get_project("project").project
+    other.get_profile("profile").profile.edit(name="renamed")
+    other.edit(permissions={session.auth_id:permissions.ProjectPermissions.VIEW})
+    watcher.poll()
+    watcher.poll()
+    assert sorted(changes) == [("project", watching.CHANGED), ("renamed", watching.CHANGED)]
+    watcher.stop()
+
+def test_background_polling(session, project):
+    changes = threading.Event()
+    with session.watch([project], lambda obj, change: changes.set(), interval=0.02):
+        project.delete()
+        assert changes.wait(2)